@@ -0,0 +1,268 @@
+"""
+Benchmarks for the degrees search engines.
+
+Usage: python benchmark.py search [directory] [queries]
+       python benchmark.py frontier [max_size]
+       python benchmark.py graph [directory] [people]
+       python benchmark.py load [directory]
+       python benchmark.py targets [directory] [targets] [processes]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+import snapshot
+from util import Node, QueueFrontier, StackFrontier
+
+
+def count_expansions(search, source, target):
+    """
+    Runs `search` from `source` to `target`, counting how many people
+    get expanded through `neighbors_for_person`.
+
+    Returns the path, the number of expansions and the elapsed seconds.
+    """
+    expansions = 0
+    neighbors_for_person = degrees.neighbors_for_person
+
+    def counting_neighbors(person_id):
+        nonlocal expansions
+        expansions += 1
+        return neighbors_for_person(person_id)
+
+    degrees.neighbors_for_person = counting_neighbors
+    try:
+        start = time.perf_counter()
+        path = search(source, target)
+        elapsed = time.perf_counter() - start
+    finally:
+        degrees.neighbors_for_person = neighbors_for_person
+
+    return path, expansions, elapsed
+
+
+def benchmark_search(directory, queries):
+    """
+    Compares node expansions and wall time of the one-sided BFS
+    against the bidirectional search on random pairs of people.
+    """
+    print(f"Loading {directory}...")
+    degrees.load_data(directory)
+    people = sorted(degrees.people)
+    rng = random.Random(0)
+
+    engines = [
+        ("bfs", degrees.shortest_path),
+        ("bidirectional", degrees.bidirectional_shortest_path),
+    ]
+    totals = {name: [0, 0.0] for name, _ in engines}
+
+    print(f"{'source':>10} {'target':>10} {'degrees':>7} "
+          + " ".join(f"{name + ' nodes':>20} {'ms':>9}" for name, _ in engines))
+    for _ in range(queries):
+        source, target = rng.sample(people, 2)
+        row = []
+        lengths = set()
+        for name, search in engines:
+            path, expansions, elapsed = count_expansions(search, source, target)
+            lengths.add(None if path is None else len(path))
+            totals[name][0] += expansions
+            totals[name][1] += elapsed
+            row.append(f"{expansions:>20} {elapsed * 1000:>9.2f}")
+        if len(lengths) != 1:
+            raise Exception(f"engines disagree on {source} -> {target}")
+        length = lengths.pop()
+        length = "-" if length is None else length
+        print(f"{source:>10} {target:>10} {length:>7} " + " ".join(row))
+
+    print()
+    for name, (expansions, elapsed) in totals.items():
+        print(f"{name}: {expansions} expansions, {elapsed:.3f}s total")
+
+
+def benchmark_frontier(max_size):
+    """
+    Fills each frontier with `size` nodes, probes `contains_state` once
+    per node and drains it again, for sizes growing tenfold up to
+    `max_size`. Linear scaling shows up as a flat time per operation.
+    """
+    print(f"{'frontier':>14} {'size':>9} {'total s':>9} {'ns/op':>9}")
+    for frontier_class in [StackFrontier, QueueFrontier]:
+        size = 1000
+        while size <= max_size:
+            frontier = frontier_class()
+            start = time.perf_counter()
+            for state in range(size):
+                frontier.add(Node(state=state, parent=None, action=None))
+            for state in range(size):
+                if not frontier.contains_state(state):
+                    raise Exception(f"state {state} missing from frontier")
+            while not frontier.empty():
+                frontier.remove()
+            elapsed = time.perf_counter() - start
+            per_op = elapsed / (3 * size) * 1e9
+            print(f"{frontier_class.__name__:>14} {size:>9} "
+                  f"{elapsed:>9.3f} {per_op:>9.1f}")
+            size *= 10
+
+
+def reset_data():
+    """
+    Forgets everything `degrees.load_data` loaded.
+    """
+    degrees.names = {}
+    degrees.people = {}
+    degrees.movies = {}
+    degrees.graph = None
+
+
+def benchmark_graph(directory, sample):
+    """
+    Compares the dict-of-sets layout with the compact graph: load time,
+    memory allocated while loading, bytes per star edge spent on the
+    adjacency itself, and neighbor expansions per second, both through
+    `neighbors_for_person` and over the graph's integer indices.
+    """
+    rng = random.Random(0)
+    people = None
+
+    print(f"{'layout':>8} {'load s':>8} {'MiB':>8} {'edges':>10} "
+          f"{'B/edge':>8} {'expansions/s':>13} {'index exp/s':>12}")
+    for layout, compact in [("dict", False), ("compact", True)]:
+        reset_data()
+        start = time.perf_counter()
+        degrees.load_data(directory, compact=compact, cache=False)
+        load_time = time.perf_counter() - start
+
+        # Load again under tracemalloc, which slows loading down
+        reset_data()
+        tracemalloc.start()
+        degrees.load_data(directory, compact=compact, cache=False)
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if compact:
+            edges = degrees.graph.edges()
+            adjacency = degrees.graph.nbytes()
+        else:
+            edges = sum(len(person["movies"])
+                        for person in degrees.people.values())
+            adjacency = (
+                sum(sys.getsizeof(person["movies"])
+                    for person in degrees.people.values())
+                + sum(sys.getsizeof(movie["stars"])
+                      for movie in degrees.movies.values())
+            )
+        if people is None:
+            people = rng.sample(sorted(degrees.people),
+                                min(sample, len(degrees.people)))
+
+        start = time.perf_counter()
+        for person_id in people:
+            degrees.neighbors_for_person(person_id)
+        expansions = len(people) / (time.perf_counter() - start)
+
+        index_expansions = "-"
+        if compact:
+            indices = [degrees.graph.person_index[person_id]
+                       for person_id in people]
+            start = time.perf_counter()
+            for person in indices:
+                for _ in degrees.graph.neighbors(person):
+                    pass
+            elapsed = time.perf_counter() - start
+            index_expansions = f"{len(indices) / elapsed:.0f}"
+
+        print(f"{layout:>8} {load_time:>8.2f} {allocated / 2 ** 20:>8.1f} "
+              f"{edges:>10} {adjacency / max(edges, 1):>8.1f} "
+              f"{expansions:>13.0f} {index_expansions:>12}")
+
+
+def benchmark_load(directory):
+    """
+    Times loading `directory` from the CSV files, writing its
+    snapshot, and loading again from the snapshot.
+    """
+    reset_data()
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=True, cache=False)
+    print(f"csv:      {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    snapshot.save(directory, degrees.graph, degrees.people, degrees.movies)
+    print(f"write:    {time.perf_counter() - start:.3f}s")
+
+    reset_data()
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=True)
+    print(f"snapshot: {time.perf_counter() - start:.3f}s")
+
+
+def benchmark_targets(directory, count, processes):
+    """
+    Times finding paths from one person to `count` targets with one
+    `shortest_path` call per target, with a single `shortest_paths`
+    search, and with that search spread over a worker pool.
+    """
+    reset_data()
+    degrees.load_data(directory, compact=True)
+    rng = random.Random(0)
+    source, *targets = rng.sample(sorted(degrees.people), count + 1)
+
+    start = time.perf_counter()
+    expected = {target: degrees.shortest_path(source, target)
+                for target in targets}
+    print(f"one search per target: {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    paths = degrees.shortest_paths(source, targets)
+    print(f"single search:         {time.perf_counter() - start:.3f}s")
+
+    with degrees.graph.pool(processes) as pool:
+        start = time.perf_counter()
+        parallel = degrees.graph.shortest_paths(source, targets, pool)
+        print(f"single search, pool:   {time.perf_counter() - start:.3f}s")
+
+    for target in targets:
+        lengths = {None if path is None else len(path)
+                   for path in [expected[target], paths[target],
+                                parallel[target]]}
+        if len(lengths) != 1:
+            raise Exception(f"searches disagree on {source} -> {target}")
+
+
+def main():
+    commands = ["search", "frontier", "graph", "load", "targets"]
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        sys.exit("Usage: python benchmark.py search [directory] [queries]\n"
+                 "       python benchmark.py frontier [max_size]\n"
+                 "       python benchmark.py graph [directory] [people]\n"
+                 "       python benchmark.py load [directory]\n"
+                 "       python benchmark.py targets [directory] [targets] "
+                 "[processes]")
+    if sys.argv[1] == "search":
+        directory = sys.argv[2] if len(sys.argv) > 2 else "large"
+        queries = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+        benchmark_search(directory, queries)
+    elif sys.argv[1] == "frontier":
+        max_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+        benchmark_frontier(max_size)
+    elif sys.argv[1] == "graph":
+        directory = sys.argv[2] if len(sys.argv) > 2 else "large"
+        sample = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+        benchmark_graph(directory, sample)
+    elif sys.argv[1] == "load":
+        directory = sys.argv[2] if len(sys.argv) > 2 else "large"
+        benchmark_load(directory)
+    else:
+        directory = sys.argv[2] if len(sys.argv) > 2 else "large"
+        count = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+        processes = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        benchmark_targets(directory, count, processes)
+
+
+if __name__ == "__main__":
+    main()
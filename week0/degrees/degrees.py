@@ -1,6 +1,9 @@
 import csv
 import sys
 
+import snapshot
+from graph import Graph
+from snapshot import Records
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,11 +15,28 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact co-star graph, used instead of the movies and stars sets
+# when the data is loaded with `compact=True`
+graph = None
 
-def load_data(directory):
+# Optional landmarks.LandmarkIndex over the compact graph
+landmark_index = None
+
+
+def load_data(directory, compact=False, cache=True):
     """
     Load data from CSV files into memory.
+
+    If `compact` is true, people and movies only hold their names
+    and titles, and the stars are kept in a compact `Graph`. Unless
+    `cache` is false, compact data is then memory-mapped from a binary
+    snapshot next to the CSV files, written on the first load and
+    rebuilt whenever the CSV files change.
     """
+    if compact:
+        load_graph(directory, cache=cache)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -52,14 +72,86 @@ def load_data(directory):
                 pass
 
 
+def load_graph(directory, cache=True):
+    """
+    Load data from CSV files into memory, storing the stars
+    as a compact `Graph` over interned person and movie ids.
+    """
+    global graph, names, people, movies
+
+    if cache:
+        data = snapshot.load(directory)
+        if data is not None:
+            graph, people, movies, names = data
+            return
+
+    # Load people
+    person_ids = []
+    person_names = []
+    person_births = []
+    names = {}
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person_ids.append(row["id"])
+            person_names.append(row["name"])
+            person_births.append(row["birth"])
+            if row["name"].lower() not in names:
+                names[row["name"].lower()] = {row["id"]}
+            else:
+                names[row["name"].lower()].add(row["id"])
+
+    # Load movies
+    movie_ids = []
+    movie_titles = []
+    movie_years = []
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movie_ids.append(row["id"])
+            movie_titles.append(row["title"])
+            movie_years.append(row["year"])
+
+    # Load stars, skipping rows that mention unknown people or movies
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+    def stars(reader):
+        for row in reader:
+            try:
+                yield (person_index[row["person_id"]],
+                       movie_index[row["movie_id"]])
+            except KeyError:
+                pass
+
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        graph = Graph.from_stars(person_ids, movie_ids, stars(reader),
+                                 person_index=person_index,
+                                 movie_index=movie_index)
+
+    people = Records(person_index, name=person_names, birth=person_births)
+    movies = Records(movie_index, title=movie_titles, year=movie_years)
+
+    if cache:
+        try:
+            snapshot.save(directory, graph, people, movies)
+        except OSError as e:
+            print(f"Could not write snapshot: {e}", file=sys.stderr)
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--compact] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=compact)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +161,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = bidirectional_shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -91,6 +183,11 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    if landmark_index is not None:
+        return landmark_index.shortest_path(source, target)
+    if graph is not None:
+        return graph.shortest_path(source, target)
+
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
     frontier.add(start)
@@ -120,6 +217,120 @@ def shortest_path(source, target):
                     frontier.add(child)
 
 
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching outwards
+    from both people at once until the two frontiers meet.
+
+    If no possible path, returns None.
+    """
+    if landmark_index is not None:
+        return landmark_index.shortest_path(source, target)
+    if graph is not None:
+        return graph.shortest_path(source, target)
+
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step
+    # that leads back towards the side's starting person
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Always grow the smaller frontier by one complete layer
+        if len(forward_layer) <= len(backward_layer):
+            layer, parents, others = forward_layer, forward, backward
+        else:
+            layer, parents, others = backward_layer, backward, forward
+
+        next_layer = []
+        meeting = None
+        for person in layer:
+            for movie, neighbor in neighbors_for_person(person):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie, person)
+                next_layer.append(neighbor)
+                if meeting is None and neighbor in others:
+                    meeting = neighbor
+
+        # Every person in a layer is equally far from its side's start,
+        # so the first meeting point found is as good as any other
+        if meeting is not None:
+            return join_paths(forward, backward, meeting)
+
+        if parents is forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    return None
+
+
+def shortest_paths(source, targets):
+    """
+    Returns a dictionary mapping each target to the shortest list of
+    (movie_id, person_id) pairs that connect the source to it, or to
+    None if there is no possible path, using a single breadth-first
+    search that stops once every target has been reached.
+    """
+    if graph is not None:
+        return graph.shortest_paths(source, targets)
+
+    paths = {}
+    remaining = set(targets)
+    parents = {source: None}
+    if source in remaining:
+        paths[source] = []
+        remaining.remove(source)
+
+    layer = [source]
+    while layer and remaining:
+        next_layer = []
+        for person in layer:
+            for movie, neighbor in neighbors_for_person(person):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie, person)
+                next_layer.append(neighbor)
+                if neighbor in remaining:
+                    paths[neighbor] = join_paths(parents, {neighbor: None},
+                                                 neighbor)
+                    remaining.remove(neighbor)
+        layer = next_layer
+
+    for target in remaining:
+        paths[target] = None
+    return paths
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Builds the (movie_id, person_id) path through `meeting` out of
+    the parent maps grown from the source and from the target.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, parent = forward[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        movie, child = backward[person]
+        path.append((movie, child))
+        person = child
+
+    return path
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -151,6 +362,9 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
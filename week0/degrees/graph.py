@@ -0,0 +1,385 @@
+"""
+Compact co-star graph for degrees.
+
+People and movies are interned to dense integer indices, and the
+person -> movies and movie -> people edges are stored as CSR
+(compressed sparse row) arrays: the movies of person `p` are
+`person_movies[person_offsets[p]:person_offsets[p + 1]]`, and likewise
+for the stars of a movie.
+"""
+
+import os
+from array import array
+from multiprocessing import Pool
+
+# Layers with at least this many people are split across a worker pool
+PARALLEL_LAYER = 10000
+
+# Graph used by pool workers, set by `start_worker`
+worker_graph = None
+
+
+class Graph():
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_people,
+                 person_index=None, movie_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+
+        # Map ids back to indices, unless the caller already has a mapping
+        if person_index is None:
+            person_index = {
+                person_id: i for i, person_id in enumerate(person_ids)
+            }
+        if movie_index is None:
+            movie_index = {
+                movie_id: i for i, movie_id in enumerate(movie_ids)
+            }
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+    def __getstate__(self):
+        # Memory-mapped arrays and snapshot indices cannot be pickled,
+        # so copy them into plain arrays and lists
+        state = dict(self.__dict__)
+        for field in ["person_offsets", "person_movies",
+                      "movie_offsets", "movie_people"]:
+            state[field] = array("i", state[field])
+        state["person_ids"] = list(self.person_ids)
+        state["movie_ids"] = list(self.movie_ids)
+        state["person_index"] = None
+        state["movie_index"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__init__(state["person_ids"], state["movie_ids"],
+                      state["person_offsets"], state["person_movies"],
+                      state["movie_offsets"], state["movie_people"])
+
+    @classmethod
+    def from_stars(cls, person_ids, movie_ids, stars,
+                   person_index=None, movie_index=None):
+        """
+        Builds a graph from lists of person and movie ids and an
+        iterable of (person_index, movie_index) star pairs.
+        Repeated pairs are stored once.
+        """
+        person_offsets, person_movies = compress(len(person_ids), stars)
+        movie_offsets, movie_people = transpose(
+            person_offsets, person_movies, len(movie_ids)
+        )
+        return cls(person_ids, movie_ids,
+                   person_offsets, person_movies,
+                   movie_offsets, movie_people,
+                   person_index=person_index, movie_index=movie_index)
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices a person index starred in.
+        """
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices that starred in a movie index.
+        """
+        offsets = self.movie_offsets
+        return self.movie_people[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person index.
+        """
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[star])
+            for movie, star in self.neighbors(self.person_index[person_id])
+        }
+
+    def shortest_path(self, source, target, limit=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using a bidirectional
+        breadth-first search over person indices.
+
+        If no possible path, or none of at most `limit` steps,
+        returns None.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if source == target:
+            return []
+
+        forward = {source: None}
+        backward = {target: None}
+        forward_layer = [source]
+        backward_layer = [target]
+        depth = 0
+
+        while forward_layer and backward_layer:
+            if limit is not None and depth >= limit:
+                return None
+            depth += 1
+
+            if len(forward_layer) <= len(backward_layer):
+                layer, parents, others = forward_layer, forward, backward
+            else:
+                layer, parents, others = backward_layer, backward, forward
+
+            next_layer = []
+            meeting = None
+            for person in layer:
+                for movie, neighbor in self.neighbors(person):
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (movie, person)
+                    next_layer.append(neighbor)
+                    if meeting is None and neighbor in others:
+                        meeting = neighbor
+
+            if meeting is not None:
+                return self.join_paths(forward, backward, meeting)
+
+            if parents is forward:
+                forward_layer = next_layer
+            else:
+                backward_layer = next_layer
+
+        return None
+
+    def single_source(self, source):
+        """
+        Runs a breadth-first search from a person index over the
+        whole graph.
+
+        Returns arrays of the distance to every person index (-1 if
+        unreachable) and of the (person, movie) index pair that leads
+        one step back towards the source (-1 for the source itself).
+        """
+        people = len(self.person_ids)
+        distances = array("i", [-1]) * people
+        parent_people = array("i", [-1]) * people
+        parent_movies = array("i", [-1]) * people
+
+        distances[source] = 0
+        layer = [source]
+        distance = 0
+        while layer:
+            distance += 1
+            next_layer = []
+            for person in layer:
+                for movie, neighbor in self.neighbors(person):
+                    if distances[neighbor] == -1:
+                        distances[neighbor] = distance
+                        parent_people[neighbor] = person
+                        parent_movies[neighbor] = movie
+                        next_layer.append(neighbor)
+            layer = next_layer
+
+        return distances, parent_people, parent_movies
+
+    def pool(self, processes=None):
+        """
+        Returns a multiprocessing pool whose workers hold this graph,
+        for use with `shortest_paths`.
+        """
+        return Pool(processes, initializer=start_worker, initargs=(self,))
+
+    def iter_shortest_paths(self, source, targets, pool=None):
+        """
+        Runs one level-synchronous breadth-first search from the source,
+        yielding (target, path) as soon as each target is reached, where
+        path is the shortest list of (movie_id, person_id) pairs from the
+        source. Unreachable targets are yielded last with a path of None.
+
+        Visited people are tracked in a bitmap over person indices.
+        Layers of at least PARALLEL_LAYER people are expanded across
+        `pool`, if given (see `Graph.pool`).
+        """
+        source_index = self.person_index[source]
+        remaining = {}
+        for target in targets:
+            remaining.setdefault(self.person_index[target], []).append(target)
+
+        visited = bytearray((len(self.person_ids) + 7) // 8)
+        visited[source_index >> 3] |= 1 << (source_index & 7)
+        parents = {source_index: None}
+
+        for target in remaining.pop(source_index, []):
+            yield target, []
+
+        layer = [source_index]
+        while layer and remaining:
+            if pool is not None and len(layer) >= PARALLEL_LAYER:
+                size = -(-len(layer) // (4 * (os.cpu_count() or 1)))
+                frozen = bytes(visited)
+                chunks = pool.imap(expand_layer, (
+                    (layer[i:i + size], frozen)
+                    for i in range(0, len(layer), size)
+                ))
+                discovered = (found for chunk in chunks for found in chunk)
+            else:
+                discovered = expand_layer((layer, visited), self)
+
+            next_layer = []
+            for neighbor, movie, person in discovered:
+                if visited[neighbor >> 3] & (1 << (neighbor & 7)):
+                    continue
+                visited[neighbor >> 3] |= 1 << (neighbor & 7)
+                parents[neighbor] = (movie, person)
+                next_layer.append(neighbor)
+                if neighbor in remaining:
+                    path = self.path_to(parents, neighbor)
+                    for target in remaining.pop(neighbor):
+                        yield target, path
+            layer = next_layer
+
+        for targets in remaining.values():
+            for target in targets:
+                yield target, None
+
+    def shortest_paths(self, source, targets, pool=None):
+        """
+        Returns a dictionary mapping each target to the shortest list
+        of (movie_id, person_id) pairs from the source, or None if it
+        cannot be reached, all found by a single breadth-first search.
+        """
+        return dict(self.iter_shortest_paths(source, targets, pool))
+
+    def path_to(self, parents, person):
+        """
+        Builds the (movie_id, person_id) path to a person index
+        out of a parent map grown from the source.
+        """
+        path = []
+        while parents[person] is not None:
+            movie, parent = parents[person]
+            path.append((self.movie_ids[movie], self.person_ids[person]))
+            person = parent
+        path.reverse()
+        return path
+
+    def join_paths(self, forward, backward, meeting):
+        """
+        Builds the (movie_id, person_id) path through `meeting` out of
+        index parent maps grown from the source and from the target.
+        """
+        path = []
+        person = meeting
+        while forward[person] is not None:
+            movie, parent = forward[person]
+            path.append((self.movie_ids[movie], self.person_ids[person]))
+            person = parent
+        path.reverse()
+
+        person = meeting
+        while backward[person] is not None:
+            movie, child = backward[person]
+            path.append((self.movie_ids[movie], self.person_ids[child]))
+            person = child
+
+        return path
+
+    def edges(self):
+        """
+        Returns the number of distinct (person, movie) star pairs.
+        """
+        return len(self.person_movies)
+
+    def nbytes(self):
+        """
+        Returns the number of bytes used by the adjacency arrays.
+        """
+        return sum(
+            len(values) * values.itemsize
+            for values in [self.person_offsets, self.person_movies,
+                           self.movie_offsets, self.movie_people]
+        )
+
+
+def start_worker(graph):
+    """
+    Pool initializer: keeps the graph for `expand_layer`.
+    """
+    global worker_graph
+    worker_graph = graph
+
+
+def expand_layer(task, graph=None):
+    """
+    Returns a (neighbor, movie, person) triple for the first
+    discovery of every unvisited neighbor of a layer of people,
+    given as a (layer, visited bitmap) task.
+    """
+    layer, visited = task
+    graph = graph if graph is not None else worker_graph
+    discovered = []
+    seen = set()
+    for person in layer:
+        for movie, neighbor in graph.neighbors(person):
+            if visited[neighbor >> 3] & (1 << (neighbor & 7)):
+                continue
+            if neighbor not in seen:
+                seen.add(neighbor)
+                discovered.append((neighbor, movie, person))
+    return discovered
+
+
+def compress(rows, pairs):
+    """
+    Builds CSR offsets and values out of (row, value) pairs,
+    dropping repeated values within a row.
+    """
+    counts = array("i", bytes(4 * (rows + 1)))
+    row_values = array("i")
+    values = array("i")
+    for row, value in pairs:
+        counts[row + 1] += 1
+        row_values.append(row)
+        values.append(value)
+
+    # Prefix sums give where each row starts
+    for row in range(rows):
+        counts[row + 1] += counts[row]
+
+    filled = array("i", counts)
+    ordered = array("i", bytes(4 * len(values)))
+    for row, value in zip(row_values, values):
+        ordered[filled[row]] = value
+        filled[row] += 1
+
+    # Sort each row and drop duplicates
+    offsets = array("i", [0])
+    unique = array("i")
+    for row in range(rows):
+        unique.extend(sorted(set(ordered[counts[row]:counts[row + 1]])))
+        offsets.append(len(unique))
+
+    return offsets, unique
+
+
+def transpose(offsets, values, columns):
+    """
+    Returns the CSR offsets and values of the transposed matrix.
+    """
+    return compress(
+        columns,
+        ((values[i], row)
+         for row in range(len(offsets) - 1)
+         for i in range(offsets[row], offsets[row + 1]))
+    )
@@ -0,0 +1,283 @@
+"""
+Landmark distance index for degrees.
+
+A handful of well-connected "landmark" people each get a full
+breadth-first search, run in parallel across processes over the compact
+graph. Their distance and parent arrays are persisted to an index file
+next to the CSVs and memory-mapped on later runs, so that:
+
+    - queries from or to a landmark are answered by walking its
+      parent array, without any search;
+    - for other queries, the landmarks give a lower bound
+      max |d(L, s) - d(L, t)| and an upper bound min d(L, s) + d(L, t)
+      on the distance. When they agree the path through the best
+      landmark is returned directly; otherwise the upper bound caps
+      how deep the bidirectional search needs to go, and landmarks
+      that reach only one of the two people prove they are not
+      connected.
+
+Usage: python landmarks.py [--directory large] [--top 16]
+                           [--processes N] [person ...]
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from multiprocessing import Pool
+
+import degrees
+import snapshot
+
+FILENAME = "landmarks.index"
+MAGIC = b"LANDMARK"
+VERSION = 1
+
+# Magic, version, byte order, people, landmarks, then the (mtime_ns, size)
+# of each CSV the index was built from
+HEADER = struct.Struct("<8sIIqq" + "qq" * len(snapshot.SOURCES))
+
+
+class LandmarkIndex():
+    def __init__(self, graph, landmarks, distances, parent_people,
+                 parent_movies):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+        self.parent_people = parent_people
+        self.parent_movies = parent_movies
+
+        # Maps a landmark's person index to its position in the index
+        self.positions = {
+            person: k for k, person in enumerate(landmarks)
+        }
+
+    def path_to_landmark(self, k, person):
+        """
+        Returns the (movie_id, person_id) path from a person index
+        to landmark `k`.
+        """
+        graph = self.graph
+        parent_people = self.parent_people[k]
+        parent_movies = self.parent_movies[k]
+        path = []
+        while person != self.landmarks[k]:
+            movie = parent_movies[person]
+            person = parent_people[person]
+            path.append((graph.movie_ids[movie], graph.person_ids[person]))
+        return path
+
+    def path_from_landmark(self, k, person):
+        """
+        Returns the (movie_id, person_id) path from landmark `k`
+        to a person index.
+        """
+        graph = self.graph
+        parent_people = self.parent_people[k]
+        parent_movies = self.parent_movies[k]
+        path = []
+        while person != self.landmarks[k]:
+            path.append((graph.movie_ids[parent_movies[person]],
+                         graph.person_ids[person]))
+            person = parent_people[person]
+        path.reverse()
+        return path
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper, k) bounds on the distance between two
+        person indices, where landmark `k` achieves the upper bound.
+
+        `upper` and `k` are None if no landmark reaches both people,
+        and `lower` is None if the landmarks prove they are not
+        connected.
+        """
+        lower = 0
+        upper = None
+        best = None
+        for k, distances in enumerate(self.distances):
+            d_source = distances[source]
+            d_target = distances[target]
+            if d_source == -1 and d_target == -1:
+                continue
+            if d_source == -1 or d_target == -1:
+                return None, None, None
+            lower = max(lower, abs(d_source - d_target))
+            if upper is None or d_source + d_target < upper:
+                upper = d_source + d_target
+                best = k
+        return lower, upper, best
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using the landmarks
+        wherever they make searching unnecessary.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source_index = graph.person_index[source]
+        target_index = graph.person_index[target]
+        if source_index == target_index:
+            return []
+
+        # Queries touching a landmark are a walk up its parent array
+        if source_index in self.positions:
+            k = self.positions[source_index]
+            if self.distances[k][target_index] == -1:
+                return None
+            return self.path_from_landmark(k, target_index)
+        if target_index in self.positions:
+            k = self.positions[target_index]
+            if self.distances[k][source_index] == -1:
+                return None
+            return self.path_to_landmark(k, source_index)
+
+        lower, upper, k = self.bounds(source_index, target_index)
+        if lower is None:
+            return None
+        if upper is None:
+            return graph.shortest_path(source, target)
+
+        via_landmark = (self.path_to_landmark(k, source_index)
+                        + self.path_from_landmark(k, target_index))
+        if lower == upper:
+            return via_landmark
+
+        # Only a path shorter than the one through the landmark is
+        # worth searching for
+        path = graph.shortest_path(source, target, limit=upper - 1)
+        return via_landmark if path is None else path
+
+
+def choose_landmarks(graph, count):
+    """
+    Returns the `count` person indices who starred in the most movies.
+    """
+    offsets = graph.person_offsets
+    people = range(len(graph.person_ids))
+    return sorted(
+        people, key=lambda person: offsets[person] - offsets[person + 1]
+    )[:count]
+
+
+def search(landmark):
+    """
+    Pool worker: runs a breadth-first search from a landmark index
+    over the graph inherited from (or loaded by) `start_worker`.
+    """
+    arrays = degrees.graph.single_source(landmark)
+    return [values.tobytes() for values in arrays]
+
+
+def start_worker(directory):
+    """
+    Pool initializer: makes sure the worker has the compact graph.
+    """
+    if degrees.graph is None:
+        degrees.load_data(directory, compact=True)
+
+
+def build(directory, landmarks, processes=None):
+    """
+    Searches from every landmark person index in parallel and writes
+    the index file into `directory`.
+    """
+    graph = degrees.graph
+    stats = snapshot.source_stats(directory)
+    path = os.path.join(directory, FILENAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+
+    with Pool(processes, initializer=start_worker,
+              initargs=(directory,)) as pool:
+        results = pool.map(search, landmarks)
+
+    try:
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, snapshot.BYTEORDER,
+                                len(graph.person_ids), len(landmarks),
+                                *stats))
+            f.write(array("i", landmarks).tobytes())
+            f.write(bytes(-4 * len(landmarks) % snapshot.ALIGNMENT))
+            for arrays in results:
+                for data in arrays:
+                    f.write(data)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def load(directory, graph):
+    """
+    Memory-maps the landmark index in `directory` for `graph`.
+
+    Returns a LandmarkIndex, or None if there is no index
+    or it is out of date.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        stats = snapshot.source_stats(directory)
+        with open(path, "rb") as f:
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, byteorder, people, count, *recorded = (
+            HEADER.unpack_from(data)
+        )
+    except struct.error:
+        return None
+    if (magic != MAGIC or version != VERSION
+            or byteorder != snapshot.BYTEORDER
+            or people != len(graph.person_ids) or recorded != stats):
+        return None
+
+    position = HEADER.size
+    landmarks = data[position:position + 4 * count].cast("i")
+    position += 4 * count + (-4 * count % snapshot.ALIGNMENT)
+
+    columns = [[], [], []]
+    for _ in range(count):
+        for column in columns:
+            column.append(data[position:position + 4 * people].cast("i"))
+            position += 4 * people
+    if position != len(data):
+        return None
+
+    return LandmarkIndex(graph, list(landmarks), *columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Precompute distances from landmark people."
+    )
+    parser.add_argument("people", nargs="*",
+                        help="landmark person ids (default: most prolific)")
+    parser.add_argument("--directory", default="large")
+    parser.add_argument("--top", type=int, default=16,
+                        help="number of landmarks to pick when none given")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=True)
+    graph = degrees.graph
+    if args.people:
+        try:
+            landmarks = [graph.person_index[person] for person in args.people]
+        except KeyError as e:
+            sys.exit(f"Unknown person id {e}.")
+    else:
+        landmarks = choose_landmarks(graph, args.top)
+
+    build(args.directory, landmarks, args.processes)
+    print(f"Indexed {len(landmarks)} landmarks into "
+          f"{os.path.join(args.directory, FILENAME)}.")
+
+
+if __name__ == "__main__":
+    main()
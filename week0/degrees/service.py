@@ -0,0 +1,221 @@
+"""
+Batch and server modes for degrees queries.
+
+Both modes load the data once, compactly, and keep it resident:
+
+    python service.py batch [--directory large] [--landmarks] [pairs.csv]
+    python service.py serve [--directory large] [--landmarks] [--port 8000]
+
+`batch` reads `source,target` name pairs from a file (or stdin) and
+streams one JSON object per line to stdout, followed by a latency and
+throughput summary on stderr. `serve` answers concurrent
+`GET /path?source=...&target=...` requests, and `GET /stats` reports
+the same summary for everything answered so far. With `--landmarks`,
+queries use the index built by landmarks.py.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+import landmarks
+
+
+class Stats():
+    """
+    Thread-safe record of query latencies.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.start = time.perf_counter()
+
+    def record(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def summary(self):
+        """
+        Returns query count, throughput and latency percentiles in ms.
+        """
+        with self.lock:
+            latencies = sorted(self.latencies)
+        elapsed = time.perf_counter() - self.start
+        summary = {
+            "queries": len(latencies),
+            "seconds": round(elapsed, 3),
+            "queries_per_second": round(len(latencies) / elapsed, 1),
+        }
+        for p in [50, 90, 99, 100]:
+            summary[f"p{p}_ms"] = round(percentile(latencies, p) * 1000, 3)
+        return summary
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of sorted `values`, or 0 if empty.
+    """
+    if not values:
+        return 0
+    return values[min(len(values) - 1, len(values) * p // 100)]
+
+
+def resolve(name):
+    """
+    Returns the person_id for a name or person_id, without prompting.
+
+    Raises ValueError if nobody matches or the name is ambiguous.
+    """
+    person_ids = sorted(degrees.names.get(name.lower(), set()))
+    if len(person_ids) == 1:
+        return person_ids[0]
+    if len(person_ids) > 1:
+        raise ValueError(f"ambiguous name, use one of {person_ids}")
+    if name in degrees.people:
+        return name
+    raise ValueError("person not found")
+
+
+def query(source, target):
+    """
+    Answers one query as a JSON-serializable dictionary.
+    """
+    answer = {"source": source, "target": target}
+    try:
+        source_id = resolve(source)
+        target_id = resolve(target)
+    except ValueError as e:
+        answer["error"] = str(e)
+        return answer
+
+    path = degrees.shortest_path(source_id, target_id)
+    if path is None:
+        answer["degrees"] = None
+        answer["path"] = None
+        return answer
+
+    answer["degrees"] = len(path)
+    answer["path"] = [
+        {
+            "movie_id": movie_id,
+            "movie": degrees.movies[movie_id]["title"],
+            "person_id": person_id,
+            "person": degrees.people[person_id]["name"],
+        }
+        for movie_id, person_id in path
+    ]
+    return answer
+
+
+def timed_query(stats, source, target):
+    """
+    Answers one query, recording its latency in `stats`.
+    """
+    start = time.perf_counter()
+    answer = query(source, target)
+    elapsed = time.perf_counter() - start
+    stats.record(elapsed)
+    answer["ms"] = round(elapsed * 1000, 3)
+    return answer
+
+
+def batch(lines):
+    """
+    Answers every `source,target` pair in `lines`,
+    writing one JSON line per pair to stdout.
+    """
+    stats = Stats()
+    for row in csv.reader(lines):
+        if not row or not "".join(row).strip():
+            continue
+        if len(row) != 2:
+            answer = {"error": f"expected source,target, got {row}"}
+        else:
+            answer = timed_query(stats, row[0].strip(), row[1].strip())
+        print(json.dumps(answer), flush=True)
+    print(json.dumps(stats.summary()), file=sys.stderr)
+
+
+class Handler(BaseHTTPRequestHandler):
+    stats = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/stats":
+            self.send_json(200, self.stats.summary())
+        elif url.path == "/path":
+            if "source" not in params or "target" not in params:
+                self.send_json(400, {"error": "source and target required"})
+                return
+            answer = timed_query(self.stats,
+                                 params["source"][0], params["target"][0])
+            self.send_json(400 if "error" in answer else 200, answer)
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port):
+    """
+    Answers queries over HTTP on `port` until interrupted.
+    """
+    Handler.stats = Stats()
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"Serving on http://127.0.0.1:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(Handler.stats.summary()), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer degrees queries.")
+    parser.add_argument("mode", choices=["batch", "serve"])
+    parser.add_argument("file", nargs="?", default="-",
+                        help="source,target pairs for batch mode")
+    parser.add_argument("--directory", default="large")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--landmarks", action="store_true",
+                        help="use the landmark index built by landmarks.py")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, compact=True)
+    if args.landmarks:
+        degrees.landmark_index = landmarks.load(args.directory, degrees.graph)
+        if degrees.landmark_index is None:
+            sys.exit("No up-to-date landmark index, run landmarks.py first.")
+    print("Data loaded.", file=sys.stderr)
+
+    if args.mode == "serve":
+        serve(args.port)
+    elif args.file == "-":
+        batch(sys.stdin)
+    else:
+        with open(args.file, encoding="utf-8", newline="") as f:
+            batch(f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Binary snapshots of the compact degrees data.
+
+The first time a directory is loaded with `compact=True`, everything
+parsed out of its CSV files is written to a snapshot next to them.
+Later runs memory-map the snapshot instead of parsing the CSVs: the
+adjacency arrays and string columns are used in place, and people are
+looked up by id or name with binary searches over presorted orders, so
+nothing proportional to the dataset is built at startup.
+
+A snapshot is ignored, and rebuilt by the caller, when its version
+differs from `VERSION` or when the mtime or size of any CSV file no
+longer matches what was recorded when it was written.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+from graph import Graph
+
+FILENAME = "degrees.snapshot"
+MAGIC = b"DEGREES\0"
+VERSION = 1
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Magic, version, byte order, then (mtime_ns, size) of each source
+HEADER = struct.Struct("<8sII" + "qq" * len(SOURCES))
+LENGTH = struct.Struct("<q")
+ALIGNMENT = 8
+BYTEORDER = 0 if sys.byteorder == "little" else 1
+
+
+class StringColumn():
+    """
+    Sequence of strings stored as one blob of NUL-terminated UTF-8
+    strings, with `offsets[i]` the byte offset where string `i` starts.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def encode(cls, strings):
+        """
+        Returns the (offsets, blob) encoding of a list of strings.
+        """
+        offsets = array("q", [0])
+        chunks = []
+        for string in strings:
+            chunk = string.encode("utf-8") + b"\0"
+            chunks.append(chunk)
+            offsets.append(offsets[-1] + len(chunk))
+        return offsets, b"".join(chunks)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("string column index out of range")
+        start = self.offsets[i]
+        end = self.offsets[i + 1] - 1
+        return str(self.blob[start:end], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Index(Mapping):
+    """
+    Maps the strings of a column to their positions, by binary search
+    over `order`, the positions sorted by `key(column[position])`.
+    """
+
+    def __init__(self, column, order, key=None):
+        self.column = column
+        self.order = order
+        self.key = key if key is not None else str
+
+    def positions(self, value):
+        """
+        Returns the list of positions whose key equals `value`.
+        """
+        order = self.order
+        column = self.column
+        key = self.key
+        i = bisect_left(order, value, key=lambda position: key(column[position]))
+        positions = []
+        while i < len(order) and key(column[order[i]]) == value:
+            positions.append(order[i])
+            i += 1
+        return positions
+
+    def __getitem__(self, value):
+        positions = self.positions(value)
+        if not positions:
+            raise KeyError(value)
+        return positions[0]
+
+    def __iter__(self):
+        return iter(self.column)
+
+    def __len__(self):
+        return len(self.column)
+
+
+class Names(Mapping):
+    """
+    Maps lowercase names to the set of corresponding person_ids.
+    """
+
+    def __init__(self, person_ids, index):
+        self.person_ids = person_ids
+        self.index = index
+
+    def __getitem__(self, name):
+        positions = self.index.positions(name)
+        if not positions:
+            raise KeyError(name)
+        return {self.person_ids[position] for position in positions}
+
+    def __iter__(self):
+        seen = set()
+        for name in self.index.column:
+            name = name.lower()
+            if name not in seen:
+                seen.add(name)
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class Records(Mapping):
+    """
+    Maps ids to dictionaries built on demand out of string columns,
+    e.g. Records(person_index, name=names, birth=births).
+    """
+
+    def __init__(self, index, **columns):
+        self.index = index
+        self.columns = columns
+
+    def __getitem__(self, key):
+        i = self.index[key]
+        return {field: column[i] for field, column in self.columns.items()}
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+def source_stats(directory):
+    """
+    Returns the (mtime_ns, size) pairs of the CSV files in `directory`.
+    """
+    stats = []
+    for source in SOURCES:
+        stat = os.stat(os.path.join(directory, source))
+        stats.extend([stat.st_mtime_ns, stat.st_size])
+    return stats
+
+
+def save(directory, graph, people, movies):
+    """
+    Writes a snapshot of a compact graph and its `Records` of people
+    and movies into `directory`.
+    """
+    stats = source_stats(directory)
+    person_names = people.columns["name"]
+    sections = [
+        graph.person_offsets, graph.person_movies,
+        graph.movie_offsets, graph.movie_people,
+    ]
+    for column in [graph.person_ids, person_names, people.columns["birth"],
+                   graph.movie_ids, movies.columns["title"],
+                   movies.columns["year"]]:
+        sections.extend(StringColumn.encode(column))
+    for column, key in [(graph.person_ids, None),
+                        (person_names, str.lower),
+                        (graph.movie_ids, None)]:
+        sections.append(array("i", sorted(range(len(column)), key=(
+            column.__getitem__ if key is None
+            else lambda i: key(column[i])
+        ))))
+
+    # Write to a temporary file first so readers never see half a snapshot
+    path = os.path.join(directory, FILENAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, BYTEORDER, *stats))
+            for section in sections:
+                data = section if isinstance(section, bytes) else section.tobytes()
+                f.write(LENGTH.pack(len(data)))
+                f.write(data)
+                f.write(bytes(-len(data) % ALIGNMENT))
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def load(directory):
+    """
+    Memory-maps the snapshot in `directory`.
+
+    Returns (graph, people, movies, names), or None if there is
+    no snapshot or it is out of date.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        stats = source_stats(directory)
+        with open(path, "rb") as f:
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, byteorder, *recorded = HEADER.unpack_from(data)
+    except struct.error:
+        return None
+    if (magic != MAGIC or version != VERSION or byteorder != BYTEORDER
+            or recorded != stats):
+        return None
+
+    sections = []
+    position = HEADER.size
+    while position < len(data):
+        length, = LENGTH.unpack_from(data, position)
+        position += LENGTH.size
+        sections.append(data[position:position + length])
+        position += length + (-length % ALIGNMENT)
+
+    (person_offsets, person_movies, movie_offsets, movie_people,
+     *strings, person_order, name_order, movie_order) = sections
+    person_offsets, person_movies, movie_offsets, movie_people = (
+        section.cast("i") for section in
+        [person_offsets, person_movies, movie_offsets, movie_people]
+    )
+    (person_ids, person_names, person_births,
+     movie_ids, movie_titles, movie_years) = (
+        StringColumn(strings[i].cast("q"), strings[i + 1])
+        for i in range(0, len(strings), 2)
+    )
+
+    person_index = Index(person_ids, person_order.cast("i"))
+    movie_index = Index(movie_ids, movie_order.cast("i"))
+    graph = Graph(person_ids, movie_ids,
+                  person_offsets, person_movies,
+                  movie_offsets, movie_people,
+                  person_index=person_index, movie_index=movie_index)
+    people = Records(person_index, name=person_names, birth=person_births)
+    movies = Records(movie_index, title=movie_titles, year=movie_years)
+    names = Names(person_ids, Index(person_names, name_order.cast("i"),
+                                    key=str.lower))
+    return graph, people, movies, names
@@ -0,0 +1,52 @@
+"""
+Times solving Tic Tac Toe from the empty board with each engine.
+
+Usage: python benchmark.py [repeats]
+"""
+
+import sys
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+def timed(engine, board):
+    """
+    Returns the action `engine` picks on `board` and the seconds it took.
+    """
+    start = time.perf_counter()
+    action = engine(board)
+    return action, time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [repeats]")
+    repeats = int(sys.argv[1]) if len(sys.argv) == 2 else 5
+    board = ttt.initial_state()
+
+    times = []
+    for _ in range(repeats):
+        action, elapsed = timed(ttt.minimax, board)
+        times.append(elapsed)
+    print(f"minimax:          {min(times) * 1000:9.2f} ms  -> {action}")
+
+    times = []
+    for _ in range(repeats):
+        bitboard.table.clear()
+        bitboard.nodes = 0
+        action, elapsed = timed(bitboard.minimax, board)
+        times.append(elapsed)
+    print(f"bitboard (cold):  {min(times) * 1000:9.2f} ms  -> {action}, "
+          f"{bitboard.nodes} positions solved")
+
+    times = []
+    for _ in range(repeats):
+        action, elapsed = timed(bitboard.minimax, board)
+        times.append(elapsed)
+    print(f"bitboard (warm):  {min(times) * 1000:9.2f} ms  -> {action}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Bitboard Tic Tac Toe engine
+
+The board is encoded as two 9-bit masks, one per player, with cell
+(i, j) at bit 3 * i + j. Wins are checked against precomputed line
+masks, and solved positions are remembered in a transposition table
+shared across moves and games.
+"""
+
+from tictactoe import X, O, terminal
+
+FULL = 0b111111111
+
+LINES = [
+    # Horizontals
+    0b000000111, 0b000111000, 0b111000000,
+    # Verticals
+    0b001001001, 0b010010010, 0b100100100,
+    # Diagonals
+    0b100010001, 0b001010100,
+]
+
+# Tries the center first, then corners, then edges
+ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Maps (x, o) masks to the value of the position for X
+table = {}
+
+# Number of positions searched, for benchmarking
+nodes = 0
+
+
+def encode(board):
+    """
+    Returns the (x, o) masks of a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def won(mask):
+    """
+    Returns True if a player's mask covers a whole line.
+    """
+    for line in LINES:
+        if mask & line == line:
+            return True
+    return False
+
+
+def value(x, o):
+    """
+    Returns 1 if X wins with perfect play from the position,
+    -1 if O wins, and 0 for a tie.
+    """
+    global nodes
+
+    key = (x, o)
+    if key in table:
+        return table[key]
+    nodes += 1
+
+    if won(x):
+        result = 1
+    elif won(o):
+        result = -1
+    elif x | o == FULL:
+        result = 0
+    else:
+        # X moves whenever both players have played equally often
+        x_turn = bin(x).count("1") == bin(o).count("1")
+        result = -2 if x_turn else 2
+        for cell in ORDER:
+            move = 1 << cell
+            if (x | o) & move:
+                continue
+            if x_turn:
+                result = max(result, value(x | move, o))
+                if result == 1:
+                    break
+            else:
+                result = min(result, value(x, o | move))
+                if result == -1:
+                    break
+
+    table[key] = result
+    return result
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    if terminal(board):
+        return None
+
+    x, o = encode(board)
+    x_turn = bin(x).count("1") == bin(o).count("1")
+
+    best = None
+    best_value = None
+    for cell in ORDER:
+        move = 1 << cell
+        if (x | o) & move:
+            continue
+        if x_turn:
+            move_value = value(x | move, o)
+            if best_value is None or move_value > best_value:
+                best, best_value = cell, move_value
+        else:
+            move_value = value(x, o | move)
+            if best_value is None or move_value < best_value:
+                best, best_value = cell, move_value
+
+    return divmod(best, 3)
@@ -0,0 +1,150 @@
+"""
+Perfect-play opening book for Tic Tac Toe
+
+`python book.py` enumerates every reachable non-terminal position once,
+solves it with the bitboard engine and writes its optimal move and value
+to BOOK as a sorted array of 32-bit entries:
+
+    (x | o << 9) << 8 | (value + 1) << 4 | cell
+
+where `x` and `o` are the players' 9-bit masks and `cell` is 3 * i + j.
+`minimax` loads the book the first time it is needed into a table
+indexed directly by position, and falls back to searching with the
+bitboard engine when there is no book.
+"""
+
+import os
+import struct
+import sys
+from array import array
+
+import bitboard
+from tictactoe import terminal
+
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+HEADER = struct.Struct("<8sI")
+MAGIC = b"TTTBOOK\0"
+VERSION = 1
+
+# Marks positions missing from the book in the loaded table
+MISSING = 0xFF
+
+# Table of (value + 1) << 4 | cell by position, None until loaded,
+# False if there is no usable book
+table = None
+
+
+def positions():
+    """
+    Yields the (x, o) masks of every reachable non-terminal position.
+    """
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen:
+            continue
+        seen.add((x, o))
+        if bitboard.won(x) or bitboard.won(o) or x | o == bitboard.FULL:
+            continue
+        yield x, o
+        x_turn = bin(x).count("1") == bin(o).count("1")
+        for cell in range(9):
+            move = 1 << cell
+            if not (x | o) & move:
+                stack.append((x | move, o) if x_turn else (x, o | move))
+
+
+def build(path=BOOK):
+    """
+    Solves every reachable position and writes the book to `path`.
+    Returns the number of positions written.
+    """
+    entries = array("I")
+    for x, o in positions():
+        x_turn = bin(x).count("1") == bin(o).count("1")
+        best = None
+        best_value = None
+        for cell in bitboard.ORDER:
+            move = 1 << cell
+            if (x | o) & move:
+                continue
+            if x_turn:
+                value = bitboard.value(x | move, o)
+                better = best_value is None or value > best_value
+            else:
+                value = bitboard.value(x, o | move)
+                better = best_value is None or value < best_value
+            if better:
+                best, best_value = cell, value
+        entries.append((x | o << 9) << 8 | (best_value + 1) << 4 | best)
+
+    entries = array("I", sorted(entries))
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION))
+        f.write(entries.tobytes())
+    return len(entries)
+
+
+def load(path=BOOK):
+    """
+    Reads the book at `path` into a table indexed by x | o << 9.
+    Returns the table, or False if there is no usable book.
+    """
+    try:
+        with open(path, "rb") as f:
+            magic, version = HEADER.unpack(f.read(HEADER.size))
+            entries = array("I", f.read())
+    except (OSError, struct.error, ValueError):
+        return False
+    if magic != MAGIC or version != VERSION:
+        return False
+
+    moves = bytearray([MISSING]) * (1 << 18)
+    for entry in entries:
+        moves[entry >> 8] = entry & 0xFF
+    return moves
+
+
+def lookup(board):
+    """
+    Returns the book's (action, value) for the board,
+    or None if there is no book or the position is not in it.
+    """
+    global table
+    if table is None:
+        table = load()
+    if not table:
+        return None
+
+    x, o = bitboard.encode(board)
+    entry = table[x | o << 9]
+    if entry == MISSING:
+        return None
+    return divmod(entry & 0xF, 3), (entry >> 4) - 1
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board,
+    from the book when possible.
+    """
+    if terminal(board):
+        return None
+    found = lookup(board)
+    if found is None:
+        return bitboard.minimax(board)
+    return found[0]
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else BOOK
+    count = build(path)
+    print(f"Wrote {count} positions to {path} "
+          f"({os.path.getsize(path)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+m,n,k-game player
+
+Generalizes Tic Tac Toe to boards of any `rows` x `cols` size where
+`k` in a row wins. Exhaustive minimax is infeasible past 3x3, so moves
+are chosen by iterative deepening alpha-beta search with a
+transposition table, move ordering and a heuristic evaluation, under a
+per-move wall-clock budget.
+"""
+
+import random
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Score of a won position, larger than any heuristic evaluation
+WIN = 10 ** 9
+
+# How many cells around existing pieces are considered for a move
+REACH = 2
+
+
+class Timeout(Exception):
+    pass
+
+
+class Game():
+    def __init__(self, rows=3, cols=3, k=3):
+        """
+        Initialize a game on a `rows` x `cols` board where `k`
+        in a row wins, precomputing every winning window.
+        """
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError("k must fit on the board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+
+        # Every run of k cells along a row, column or diagonal,
+        # as flat cell indices i * cols + j
+        self.windows = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        self.windows.append(tuple(
+                            (i + di * step) * cols + (j + dj * step)
+                            for step in range(k)
+                        ))
+
+        # Maps each cell to the windows it belongs to
+        self.cell_windows = [[] for _ in range(rows * cols)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(w)
+
+        # Value of a window holding `count` pieces of only one player
+        self.weights = [0] + [4 ** count for count in range(1, k)] + [WIN]
+
+        # Zobrist keys for hashing positions into the transposition table
+        rng = random.Random(0)
+        self.keys = {
+            X: [rng.getrandbits(64) for _ in range(rows * cols)],
+            O: [rng.getrandbits(64) for _ in range(rows * cols)],
+        }
+        self.table = {}
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.cols for _ in range(self.rows)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x_count = sum(row.count(X) for row in board)
+        o_count = sum(row.count(O) for row in board)
+        return X if x_count == o_count else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j)
+            for i, row in enumerate(board)
+            for j, cell in enumerate(row)
+            if cell == EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.cols) \
+                or board[i][j] != EMPTY:
+            raise ValueError("Invalid Action.")
+        new_board = [row.copy() for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = [cell for row in board for cell in row]
+        for window in self.windows:
+            first = cells[window[0]]
+            if first != EMPTY and all(cells[c] == first for c in window):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board)
+        if winner == X:
+            return 1
+        elif winner == O:
+            return -1
+        return 0
+
+    def minimax(self, board, budget=1.0):
+        """
+        Returns the best action found for the current player on the
+        board within `budget` seconds.
+        """
+        return self.best_move(board, budget)[0]
+
+    def best_move(self, board, budget=1.0):
+        """
+        Searches the board with iterative deepening alpha-beta until
+        `budget` seconds have passed or the game is solved.
+
+        Returns the best action and a dictionary of search statistics:
+        the deepest completed `depth`, `nodes` searched, `nps` (nodes
+        per second), `seconds` spent and the `score` of the action.
+        """
+        if self.terminal(board):
+            return None, None
+
+        search = Search(self, board, time.perf_counter() + budget)
+        start = time.perf_counter()
+        empty = sum(row.count(EMPTY) for row in board)
+        best = None
+        score = 0
+        depth = 0
+
+        try:
+            for depth in range(1, empty + 1):
+                score, best = search.root(depth)
+                search.completed = depth
+                if abs(score) >= WIN - self.rows * self.cols:
+                    break
+        except Timeout:
+            pass
+
+        # Even the first iteration ran out of time: take any sensible move
+        if best is None:
+            best = search.ordered_moves(None)[0]
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            "depth": search.completed,
+            "nodes": search.nodes,
+            "nps": round(search.nodes / elapsed) if elapsed else 0,
+            "seconds": round(elapsed, 3),
+            "score": score,
+        }
+        return divmod(best, self.cols), stats
+
+
+class Search():
+    """
+    State of one move's search: a flat board with per-window piece
+    counts and a running evaluation, updated incrementally as moves
+    are made and unmade.
+    """
+
+    def __init__(self, game, board, deadline):
+        self.game = game
+        self.deadline = deadline
+        self.nodes = 0
+        self.completed = 0
+        self.cells = [cell for row in board for cell in row]
+        self.turn = game.player(board)
+        self.history = [0] * len(self.cells)
+
+        self.counts = {X: [0] * len(game.windows), O: [0] * len(game.windows)}
+        self.hash = 0
+        self.won = False
+        for cell, piece in enumerate(self.cells):
+            if piece != EMPTY:
+                self.hash ^= game.keys[piece][cell]
+                for w in game.cell_windows[cell]:
+                    self.counts[piece][w] += 1
+        self.score = sum(self.window_score(w) for w in range(len(game.windows)))
+
+    def window_score(self, w):
+        """
+        Returns the value of window `w` for X.
+        """
+        x_count = self.counts[X][w]
+        o_count = self.counts[O][w]
+        if o_count == 0:
+            return self.game.weights[x_count]
+        if x_count == 0:
+            return -self.game.weights[o_count]
+        return 0
+
+    def play(self, cell):
+        """
+        Places the current player's piece on `cell`.
+        """
+        piece = self.turn
+        counts = self.counts[piece]
+        for w in self.game.cell_windows[cell]:
+            self.score -= self.window_score(w)
+            counts[w] += 1
+            self.score += self.window_score(w)
+            if counts[w] == self.game.k:
+                self.won = True
+        self.cells[cell] = piece
+        self.hash ^= self.game.keys[piece][cell]
+        self.turn = O if piece == X else X
+
+    def undo(self, cell):
+        """
+        Takes back the piece on `cell`.
+        """
+        piece = self.cells[cell]
+        counts = self.counts[piece]
+        for w in self.game.cell_windows[cell]:
+            self.score -= self.window_score(w)
+            counts[w] -= 1
+            self.score += self.window_score(w)
+        self.won = False
+        self.cells[cell] = EMPTY
+        self.hash ^= self.game.keys[piece][cell]
+        self.turn = piece
+
+    def ordered_moves(self, first):
+        """
+        Returns empty cells near existing pieces, trying `first`
+        (the transposition table's best move) and then cells with
+        the best history of causing cutoffs.
+        """
+        game = self.game
+        cols = game.cols
+        occupied = [cell for cell, piece in enumerate(self.cells)
+                    if piece != EMPTY]
+        if not occupied:
+            return [(game.rows // 2) * cols + cols // 2]
+
+        candidates = set()
+        for cell in occupied:
+            i, j = divmod(cell, cols)
+            for ni in range(max(0, i - REACH), min(game.rows, i + REACH + 1)):
+                for nj in range(max(0, j - REACH), min(cols, j + REACH + 1)):
+                    if self.cells[ni * cols + nj] == EMPTY:
+                        candidates.add(ni * cols + nj)
+
+        moves = sorted(candidates, key=lambda cell: -self.history[cell])
+        if first in candidates:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def root(self, depth):
+        """
+        Searches every move at the root to `depth`.
+        Returns the best score for the player to move and its move.
+        """
+        entry = self.game.table.get(self.hash)
+        first = entry[3] if entry is not None else None
+        best_score = -WIN - 1
+        best = None
+        alpha = -WIN - 1
+        for cell in self.ordered_moves(first):
+            self.play(cell)
+            score = -self.negamax(depth - 1, -WIN - 1, -alpha, 1)
+            self.undo(cell)
+            if score > best_score:
+                best_score, best = score, cell
+            alpha = max(alpha, score)
+        self.game.table[self.hash] = (depth, best_score, 0, best)
+        return best_score, best
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        Returns the score of the position for the player to move,
+        searching `depth` more plies with alpha-beta pruning.
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+
+        sign = 1 if self.turn == X else -1
+
+        # The previous move won, so the player to move has lost
+        if self.won:
+            return -(WIN - ply)
+        if EMPTY not in self.cells:
+            return 0
+        if depth == 0:
+            return sign * self.score
+
+        # Transposition table entries are (depth, score, flag, move),
+        # with flag -1 for an upper bound and 1 for a lower bound
+        original_alpha = alpha
+        entry = self.game.table.get(self.hash)
+        first = None
+        if entry is not None:
+            entry_depth, entry_score, flag, first = entry
+            if entry_depth >= depth:
+                if flag == 0:
+                    return entry_score
+                if flag == 1:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
+
+        best_score = -WIN - 1
+        best = None
+        for cell in self.ordered_moves(first):
+            self.play(cell)
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            self.undo(cell)
+            if score > best_score:
+                best_score, best = score, cell
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.history[cell] += depth * depth
+                break
+
+        if best_score <= original_alpha:
+            flag = -1
+        elif best_score >= beta:
+            flag = 1
+        else:
+            flag = 0
+        self.game.table[self.hash] = (depth, best_score, flag, best)
+        return best_score
@@ -2,8 +2,23 @@ import pygame
 import sys
 import time
 
+import book
+import mnk
 import tictactoe as ttt
 
+# Play on a rows x cols board with k in a row, e.g. `runner.py 5 5 4`
+if len(sys.argv) not in [1, 4]:
+    sys.exit("Usage: python runner.py [rows cols k]")
+if len(sys.argv) == 4:
+    rows, cols, k = (int(arg) for arg in sys.argv[1:])
+    game = mnk.Game(rows, cols, k)
+else:
+    rows, cols = 3, 3
+    game = ttt
+
+# Seconds the m,n,k engine may think per move
+BUDGET = 1.0
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -18,7 +33,7 @@ largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
-board = ttt.initial_state()
+board = game.initial_state()
 ai_turn = False
 
 while True:
@@ -67,13 +82,13 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_size = min(80, (height - 120) // rows, (width - 40) // cols)
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -83,18 +98,23 @@ while True:
 
                 if board[i][j] != ttt.EMPTY:
                     move = moveFont.render(board[i][j], True, white)
+                    if tile_size < 80:
+                        move = pygame.transform.smoothscale(move, (
+                            move.get_width() * tile_size // 80,
+                            move.get_height() * tile_size // 80
+                        ))
                     moveRect = move.get_rect()
                     moveRect.center = rect.center
                     screen.blit(move, moveRect)
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = game.terminal(board)
+        player = game.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = game.winner(board)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -112,8 +132,13 @@ while True:
         if user != player and not game_over:
             if ai_turn:
                 time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
+                if game is ttt:
+                    move = book.minimax(board)
+                else:
+                    move, stats = game.best_move(board, BUDGET)
+                    print(f"{move}: depth {stats['depth']}, "
+                          f"{stats['nodes']} nodes, {stats['nps']} nodes/s")
+                board = game.result(board, move)
                 ai_turn = False
             else:
                 ai_turn = True
@@ -122,10 +147,10 @@ while True:
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
+                        board = game.result(board, (i, j))
 
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
@@ -140,7 +165,7 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
+                    board = game.initial_state()
                     ai_turn = False
 
     pygame.display.flip()
@@ -0,0 +1,211 @@
+"""
+Headless self-play tournament for the Tic Tac Toe engines.
+
+Every engine plays AI-vs-AI games against itself, which perfect play
+always ties, and games against a random player as both X and O, which
+perfect play never loses. Each engine's games are spread across a
+process pool of its own, and the opening book is built first if there
+is none. For each engine the harness reports games per second, nodes
+expanded per move, move latency percentiles, and any game whose
+outcome breaks perfect play.
+
+Usage: python tournament.py [--games 20] [--processes N]
+                            [--engines minimax bitboard book mnk]
+"""
+
+import argparse
+import random
+import time
+from multiprocessing import Pool
+
+import bitboard
+import book
+import mnk
+import tictactoe as ttt
+
+ENGINES = ["minimax", "bitboard", "book", "mnk"]
+MODES = ["self", "x-vs-random", "o-vs-random"]
+
+# Games per pool task
+CHUNK = 5
+
+
+def count_calls(function):
+    """
+    Wraps `function` so that `wrapper.calls` counts its calls.
+    """
+    def wrapper(*args):
+        wrapper.calls += 1
+        return function(*args)
+    wrapper.calls = 0
+    return wrapper
+
+
+def make_engine(name):
+    """
+    Returns a function mapping a board to (action, nodes expanded).
+    """
+    if name == "minimax":
+        # Every node minimax visits starts by checking `terminal`
+        if not hasattr(ttt.terminal, "calls"):
+            ttt.terminal = count_calls(ttt.terminal)
+        counted = ttt.terminal
+
+        def engine(board):
+            before = counted.calls
+            action = ttt.minimax(board)
+            return action, counted.calls - before
+        return engine
+
+    if name in ["bitboard", "book"]:
+        search = bitboard.minimax if name == "bitboard" else book.minimax
+
+        def engine(board):
+            before = bitboard.nodes
+            action = search(board)
+            return action, bitboard.nodes - before
+        return engine
+
+    if name == "mnk":
+        game = mnk.Game(3, 3, 3)
+
+        def engine(board):
+            action, stats = game.best_move(board, budget=10)
+            return action, stats["nodes"]
+        return engine
+
+    raise ValueError(f"unknown engine {name}")
+
+
+def play(engine, mode, rng):
+    """
+    Plays one game in `mode` and returns the winner (or None for a tie),
+    the AI's move latencies in seconds and its nodes per move.
+    """
+    board = ttt.initial_state()
+    latencies = []
+    nodes = []
+    while not ttt.terminal(board):
+        player = ttt.player(board)
+        if (mode == "self"
+                or (mode == "x-vs-random" and player == ttt.X)
+                or (mode == "o-vs-random" and player == ttt.O)):
+            start = time.perf_counter()
+            action, expanded = engine(board)
+            latencies.append(time.perf_counter() - start)
+            nodes.append(expanded)
+        else:
+            action = rng.choice(sorted(ttt.actions(board)))
+        board = ttt.result(board, action)
+    return ttt.winner(board), latencies, nodes
+
+
+def perfect(mode, winner):
+    """
+    Returns True if a game's winner is consistent with perfect play.
+    """
+    if mode == "self":
+        return winner is None
+    if mode == "x-vs-random":
+        return winner != ttt.O
+    return winner != ttt.X
+
+
+def run_games(task):
+    """
+    Pool worker: plays `count` games of one engine in one mode.
+    """
+    name, mode, seed, count = task
+    engine = make_engine(name)
+    rng = random.Random(seed)
+    results = {"games": 0, "failures": [], "latencies": [], "nodes": []}
+    for _ in range(count):
+        winner, latencies, nodes = play(engine, mode, rng)
+        results["games"] += 1
+        if not perfect(mode, winner):
+            results["failures"].append((mode, seed, winner))
+        results["latencies"].extend(latencies)
+        results["nodes"].extend(nodes)
+    return results
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of sorted `values`, or 0 if empty.
+    """
+    if not values:
+        return 0
+    return values[min(len(values) - 1, len(values) * p // 100)]
+
+
+def prepare_book():
+    """
+    Builds the opening book if there is none, so that the book engine
+    is measured rather than its bitboard fallback, or says that it
+    will be if the book cannot be written.
+    """
+    if book.load():
+        return
+    try:
+        # Build in a worker, leaving this process's search tables cold
+        with Pool(1) as pool:
+            count = pool.apply(book.build)
+        print(f"    built a book of {count} positions")
+    except OSError as error:
+        print(f"    no book ({error}): book measures the bitboard fallback")
+
+
+def tournament(engines, games, processes):
+    """
+    Plays `games` games per mode for every engine and prints a report.
+    """
+    print(f"{'engine':>9} {'games':>6} {'games/s':>9} {'nodes/move':>11} "
+          f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'failures':>8}")
+    for name in engines:
+        if name == "book":
+            prepare_book()
+        tasks = [
+            (name, mode, seed, min(CHUNK, games - seed))
+            for mode in MODES
+            for seed in range(0, games, CHUNK)
+        ]
+
+        # A fresh pool per engine, so that no engine inherits the tables
+        # another one warmed up in the workers
+        with Pool(processes) as pool:
+            start = time.perf_counter()
+            results = pool.map(run_games, tasks)
+            elapsed = time.perf_counter() - start
+
+        played = sum(result["games"] for result in results)
+        failures = [f for result in results for f in result["failures"]]
+        latencies = sorted(
+            latency for result in results
+            for latency in result["latencies"]
+        )
+        nodes = [n for result in results for n in result["nodes"]]
+        print(f"{name:>9} {played:>6} {played / elapsed:>9.1f} "
+              f"{sum(nodes) / max(len(nodes), 1):>11.1f} "
+              + " ".join(f"{percentile(latencies, p) * 1000:>8.3f}"
+                         for p in [50, 90, 99, 100])
+              + f" {len(failures):>8}")
+        for mode, seed, winner in failures:
+            print(f"    {mode} game (seed {seed}) won by {winner}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Tic Tac Toe engines against each other."
+    )
+    parser.add_argument("--games", type=int, default=20,
+                        help="games per mode for each engine")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES,
+                        default=ENGINES)
+    args = parser.parse_args()
+    tournament(args.engines, args.games, args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmarks the entailment engines on generated knights and knaves puzzles.
+
+For every number of characters, each engine answers whether every
+symbol is entailed by the same random puzzles, the way puzzle.py does.
+The report gives the time per puzzle and the peak memory allocated
+while solving, and any puzzle where the engines disagree.
+An engine that takes longer than the time limit is skipped for larger
+puzzles.
+
+Usage: python benchmark.py [--sizes 2 4 8 16] [--puzzles 3]
+                           [--engines enumerate bitset sat kb backbone]
+                           [--limit 1] [--seed 0]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from generator import generate
+from logic import And, Not, Or, Symbol, model_check
+from sat import KnowledgeBase
+
+ENGINES = ["enumerate", "bitset", "sat", "kb", "backbone"]
+
+P, Q, R = Symbol("P"), Symbol("Q"), Symbol("R")
+
+# Small knowledge bases, their symbols and the ones they entail, that
+# once tripped up an engine
+REGRESSIONS = [
+    # A clause already satisfied when added hid its other variables
+    (And(P, Or(P, Q)), [P, Q], [P]),
+    (And(Not(P), Or(Not(P), Q, R), Or(Q, R)), [P, Q, R], []),
+]
+
+
+def solve(engine, knowledge, symbols):
+    """
+    Returns the symbols `engine` finds entailed by `knowledge`.
+    """
+    if engine == "kb":
+        kb = KnowledgeBase(knowledge)
+        return [symbol for symbol in symbols if kb.entails(symbol)]
+    if engine == "backbone":
+        values = KnowledgeBase(knowledge).entailed_symbols()
+        return [symbol for symbol in symbols if values.get(symbol)]
+    return [
+        symbol for symbol in symbols
+        if model_check(knowledge, symbol, engine=engine)
+    ]
+
+
+def measure(engine, knowledge, symbols):
+    """
+    Returns the symbols `engine` finds entailed by `knowledge`, the
+    seconds it took, and the peak bytes allocated while solving.
+    """
+    # Tracing allocations slows solving down, so time a separate run
+    start = time.perf_counter()
+    entailed = solve(engine, knowledge, symbols)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    solve(engine, knowledge, symbols)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return entailed, elapsed, peak
+
+
+def check(engines):
+    """
+    Prints any of the `REGRESSIONS` that an engine gets wrong.
+    """
+    for engine in engines:
+        for knowledge, symbols, expected in REGRESSIONS:
+            try:
+                found = solve(engine, knowledge, symbols)
+            except Exception as error:
+                found = f"{type(error).__name__}: {error}"
+            if found != expected:
+                print(f"    {engine} fails on {knowledge.formula()}: "
+                      f"expected {expected}, got {found}")
+
+
+def benchmark(sizes, puzzles, engines, limit, seed):
+    """
+    Solves `puzzles` puzzles of every size in `sizes` with each engine
+    and prints a report.
+    """
+    check(engines)
+    print(f"{'n':>4} {'engine':>10} {'ms/puzzle':>11} {'peak KiB':>10} "
+          f"{'entailed':>9}")
+    skipped = set()
+    for n in sizes:
+        problems = [
+            generate(n, seed=seed + i) for i in range(puzzles)
+        ]
+        answers = [None] * puzzles
+        for engine in engines:
+            if engine in skipped:
+                continue
+
+            total = 0
+            peak = 0
+            entailed = 0
+            for i, (knowledge, symbols, model) in enumerate(problems):
+                found, elapsed, memory = measure(engine, knowledge, symbols)
+                total += elapsed
+                peak = max(peak, memory)
+                entailed += len(found)
+
+                # Entailed symbols hold in every model, the hidden one too
+                if any(not model[symbol.name] for symbol in found):
+                    print(f"    {engine} entailed a false symbol "
+                          f"(n={n}, seed={seed + i})")
+                if answers[i] is None:
+                    answers[i] = (engine, found)
+                elif answers[i][1] != found:
+                    print(f"    {engine} disagrees with {answers[i][0]} "
+                          f"(n={n}, seed={seed + i})")
+
+            print(f"{n:>4} {engine:>10} {total / puzzles * 1000:>11.2f} "
+                  f"{peak / 1024:>10.1f} {entailed / puzzles:>9.1f}")
+            if total / puzzles > limit:
+                skipped.add(engine)
+                print(f"    skipping {engine} for larger puzzles")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark entailment engines on random puzzles."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[2, 4, 6, 8, 12, 16, 32, 64, 128],
+                        help="numbers of characters")
+    parser.add_argument("--puzzles", type=int, default=3,
+                        help="puzzles per size")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES,
+                        default=ENGINES)
+    parser.add_argument("--limit", type=float, default=1,
+                        help="seconds per puzzle before an engine is skipped")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.sizes, args.puzzles, args.engines, args.limit, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Compiled evaluation of logical sentences over many models at once.
+
+`compile_sentence` turns a `Sentence` tree into a flat array of
+instructions over symbol indices, with every shared subformula
+computed once. Instructions only use bitwise operators, so the same code
+evaluates a single model (every symbol 0 or 1) or a whole block of
+models packed into integers, where bit m of a symbol's mask is its
+value in model m.
+
+`entails` uses this to check all 2^n models of knowledge and query in
+a handful of big-integer operations per block of models.
+"""
+
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+# Number of symbols enumerated within one block of 2^BLOCK models
+BLOCK = 20
+
+# Instruction operators
+NOT, AND, OR, IMPLIES, IFF = range(5)
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Returns a function `evaluate(values, full=1)` for `sentence`, where
+    `values[i]` is the value of `symbols[i]` and `full` is the value
+    of true: 1 for a single model, or a mask with a bit per model.
+    """
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+
+    # Instructions (operator, operands) each compute one register;
+    # registers 0 to len(symbols) - 1 hold the symbols' values.
+    # Subformulas are keyed by identity, since hashing a sentence
+    # walks its whole tree
+    program = []
+    registers = {}
+
+    def emit(sentence):
+        """
+        Adds instructions computing `sentence` and returns its register.
+        """
+        if isinstance(sentence, Symbol):
+            if sentence.name not in index:
+                raise Exception(f"variable {sentence.name} not in model")
+            return index[sentence.name]
+        if id(sentence) in registers:
+            return registers[id(sentence)]
+
+        if isinstance(sentence, Not):
+            instruction = (NOT, (emit(sentence.operand),))
+        elif isinstance(sentence, And):
+            instruction = (AND, tuple(emit(c) for c in sentence.conjuncts))
+        elif isinstance(sentence, Or):
+            instruction = (OR, tuple(emit(d) for d in sentence.disjuncts))
+        elif isinstance(sentence, Implication):
+            instruction = (IMPLIES, (emit(sentence.antecedent),
+                                     emit(sentence.consequent)))
+        elif isinstance(sentence, Biconditional):
+            instruction = (IFF, (emit(sentence.left), emit(sentence.right)))
+        else:
+            raise TypeError("must be a logical sentence")
+
+        program.append(instruction)
+        registers[id(sentence)] = len(symbols) + len(program) - 1
+        return registers[id(sentence)]
+
+    result = emit(sentence)
+
+    def evaluate(values, full=1):
+        registers = list(values)
+        for operator, operands in program:
+            if operator == AND:
+                value = full
+                for operand in operands:
+                    value &= registers[operand]
+            elif operator == OR:
+                value = 0
+                for operand in operands:
+                    value |= registers[operand]
+            elif operator == NOT:
+                value = full ^ registers[operands[0]]
+            else:
+                left = registers[operands[0]]
+                right = registers[operands[1]]
+                if operator == IMPLIES:
+                    value = (full ^ left) | right
+                else:
+                    value = full ^ left ^ right
+            registers.append(value)
+        return registers[result]
+
+    return evaluate
+
+
+def symbol_masks(count):
+    """
+    Returns the masks of `count` symbols over all 2^count models, where
+    symbol i is true in model m if bit i of m is set, and the mask of
+    all models.
+    """
+    size = 1 << count
+    full = (1 << size) - 1
+    masks = []
+    for i in range(count):
+        # 2^i false models followed by 2^i true ones, repeated
+        width = 1 << i
+        pattern = ((1 << width) - 1) << width
+        period = 2 * width
+        while period < size:
+            pattern |= pattern << period
+            period *= 2
+        masks.append(pattern)
+    return masks, full
+
+
+def truth_table(sentence, symbols):
+    """
+    Returns a mask whose bit m is set if `sentence` is true in model m,
+    where symbol i is true in model m if bit i of m is set.
+    """
+    masks, full = symbol_masks(len(symbols))
+    return compile_sentence(sentence, symbols)(masks, full)
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that no model
+    makes knowledge true and query false.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    counterexample = compile_sentence(And(knowledge, Not(query)), symbols)
+
+    # The first BLOCK symbols vary within a block of models; the rest
+    # are constant within a block, so each is either 0 or full
+    low = min(len(symbols), BLOCK)
+    masks, full = symbol_masks(low)
+    for block in range(1 << (len(symbols) - low)):
+        values = masks + [
+            full if block >> i & 1 else 0
+            for i in range(len(symbols) - low)
+        ]
+        if counterexample(values, full):
+            return False
+    return True
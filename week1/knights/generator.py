@@ -0,0 +1,115 @@
+"""
+Random knights and knaves puzzles
+
+Every character is secretly a knight, who always tells the truth, or a
+knave, who always lies. `generate` picks a hidden assignment, then has
+characters make random statements about each other that are consistent
+with it, encoded the same way as the puzzles in puzzle.py.
+
+Usage: python generator.py characters [statements] [seed]
+"""
+
+import random
+import string
+import sys
+
+from logic import Symbol, Not, And, Or, Implication, Biconditional, intern
+
+
+def names(n):
+    """
+    Returns the names of `n` characters: A to Z, then C26, C27, ...
+    """
+    return [
+        string.ascii_uppercase[i] if i < 26 else f"C{i}"
+        for i in range(n)
+    ]
+
+
+def character_symbols(name):
+    """
+    Returns the (knight, knave) symbols of the character called `name`.
+    """
+    return Symbol(f"{name} is a Knight"), Symbol(f"{name} is a Knave")
+
+
+def statement(characters, rng, depth):
+    """
+    Returns a random claim about `characters`' kinds, nested up to
+    `depth` connectives deep.
+    """
+    if depth == 0 or rng.random() < 0.3:
+        knight, knave = rng.choice(characters)
+        return rng.choice([knight, knave])
+
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(statement(characters, rng, depth - 1))
+    if kind == 1:
+        return And(*[statement(characters, rng, depth - 1)
+                     for _ in range(rng.randint(2, 3))])
+    if kind == 2:
+        return Or(*[statement(characters, rng, depth - 1)
+                    for _ in range(rng.randint(2, 3))])
+    if kind == 3:
+        return Implication(statement(characters, rng, depth - 1),
+                           statement(characters, rng, depth - 1))
+    return Biconditional(statement(characters, rng, depth - 1),
+                         statement(characters, rng, depth - 1))
+
+
+def generate(n, statements=None, seed=None, depth=2):
+    """
+    Returns a random puzzle with `n` characters making `statements`
+    statements (one per character by default), as the knowledge base,
+    the list of symbols, and the hidden model the statements agree with.
+    """
+    rng = random.Random(seed)
+    if statements is None:
+        statements = n
+
+    characters = [character_symbols(name) for name in names(n)]
+    model = {}
+    knowledge = []
+    for knight, knave in characters:
+        is_knight = rng.random() < 0.5
+        model[knight.name] = is_knight
+        model[knave.name] = not is_knight
+
+        # Every character is exactly one of a knight and a knave
+        knowledge.append(Or(knight, knave))
+        knowledge.append(Not(And(knight, knave)))
+
+    for _ in range(statements):
+        knight, knave = rng.choice(characters)
+        claim = statement(characters, rng, depth)
+
+        # Knights' statements are true and knaves' are false
+        if claim.evaluate(model) != model[knight.name]:
+            claim = Not(claim)
+        knowledge.append(Implication(knight, claim))
+        knowledge.append(Implication(knave, Not(claim)))
+
+    symbols = [symbol for character in characters for symbol in character]
+    return intern(And(*knowledge)), symbols, model
+
+
+def main():
+    if not 2 <= len(sys.argv) <= 4:
+        sys.exit("Usage: python generator.py characters [statements] [seed]")
+    n = int(sys.argv[1])
+    statements = int(sys.argv[2]) if len(sys.argv) >= 3 else None
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    knowledge, symbols, model = generate(n, statements, seed)
+    print("Knowledge")
+    for sentence in knowledge.conjuncts:
+        print(f"    {sentence.formula()}")
+    print("Hidden solution")
+    for symbol in symbols:
+        if model[symbol.name]:
+            print(f"    {symbol}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import itertools
+import weakref
 
 
 class Sentence():
@@ -225,8 +226,116 @@ class Biconditional(Sentence):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+class Interned():
+    """
+    Mixin for sentences returned by `intern`. Interned sentences are
+    shared and immutable, so their hash and symbols are computed once,
+    and two interned sentences are equal only if they are the same node.
+    """
+
+    def __eq__(self, other):
+        if isinstance(other, Interned):
+            return self is other
+        if not isinstance(other, Sentence):
+            return NotImplemented
+        return self is intern(other)
+
+    def __hash__(self):
+        return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        # Pickle a plain copy, which is interned again when loaded
+        cls = type(self).__bases__[1]
+        plain = object.__new__(cls)
+        plain.__dict__.update(
+            (attribute, value) for attribute, value in vars(self).items()
+            if attribute not in ("_hash", "_symbols")
+        )
+        return intern, (plain,)
+
+    def add(self, conjunct):
+        raise TypeError("interned sentences are immutable")
+
+    def symbols(self):
+        return set(self._symbols)
+
+
+# Maps each sentence class to its interned subclass
+interned_classes = {}
+
+# Maps the structure of every live interned sentence to its node
+interned = weakref.WeakValueDictionary()
+
+
+def intern(sentence):
+    """
+    Returns the shared interned node that is structurally equal to
+    `sentence`, interning its subformulas first.
+    """
+    if isinstance(sentence, Interned):
+        return sentence
+    Sentence.validate(sentence)
+
+    cls = type(sentence)
+    attributes = {}
+    for attribute, value in vars(sentence).items():
+        if isinstance(value, Sentence):
+            value = intern(value)
+        elif isinstance(value, list):
+            value = [intern(operand) for operand in value]
+        attributes[attribute] = value
+
+    # Children are interned, so their identities determine the structure
+    key = (cls, tuple(
+        (attribute, tuple(map(id, value)) if isinstance(value, list)
+         else id(value) if isinstance(value, Sentence) else value)
+        for attribute, value in sorted(attributes.items())
+    ))
+    node = interned.get(key)
+    if node is not None:
+        return node
+
+    if cls not in interned_classes:
+        interned_classes[cls] = type(cls.__name__, (Interned, cls), {})
+    node = object.__new__(interned_classes[cls])
+    node.__dict__.update(attributes)
+    node._hash = cls.__hash__(node)
+    if isinstance(node, Symbol):
+        node._symbols = frozenset([node.name])
+    else:
+        node._symbols = frozenset().union(*[
+            child._symbols
+            for value in attributes.values()
+            for child in (value if isinstance(value, list) else [value])
+            if isinstance(child, Sentence)
+        ])
+    interned[key] = node
+    return node
+
+
+def model_check(knowledge, query, engine="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    The "enumerate" engine checks every model of the symbols; the "sat"
+    engine compiles knowledge ∧ ¬query to CNF and checks that it is
+    unsatisfiable with the solver in sat.py; the "bitset" engine checks
+    blocks of models at once with the compiled evaluator in evaluator.py.
+    """
+    if engine == "sat":
+        from sat import entails
+        return entails(knowledge, query)
+    elif engine == "bitset":
+        from evaluator import entails
+        return entails(knowledge, query)
+    elif engine != "enumerate":
+        raise ValueError(f"unknown engine {engine}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
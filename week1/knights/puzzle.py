@@ -1,38 +1,39 @@
 from logic import *
+from sat import KnowledgeBase
 
-AKnight = Symbol("A is a Knight")
-AKnave = Symbol("A is a Knave")
+AKnight = intern(Symbol("A is a Knight"))
+AKnave = intern(Symbol("A is a Knave"))
 
-BKnight = Symbol("B is a Knight")
-BKnave = Symbol("B is a Knave")
+BKnight = intern(Symbol("B is a Knight"))
+BKnave = intern(Symbol("B is a Knave"))
 
-CKnight = Symbol("C is a Knight")
-CKnave = Symbol("C is a Knave")
+CKnight = intern(Symbol("C is a Knight"))
+CKnave = intern(Symbol("C is a Knave"))
 
 # Puzzle 0
 # A says "I am both a knight and a knave."
-knowledge0 = And(
+knowledge0 = intern(And(
     And(Or(AKnight, AKnave), Not((And(AKnave, AKnight)))),
     Implication(AKnight, And(AKnight, AKnave)),
     Implication(AKnave, Not(And(AKnight, AKnave))),
-)
+))
 
 # Puzzle 1
 # A says "We are both knaves."
 # B says nothing.
-knowledge1 = And(
+knowledge1 = intern(And(
     And(
         And(Or(AKnight, AKnave), Not((And(AKnave, AKnight)))),
         And(Or(BKnight, BKnave), Not((And(BKnave, BKnight)))),
     ),
     Implication(AKnight, And(AKnave, BKnave)),
     Implication(AKnave, Not(And(AKnave, BKnave))),
-)
+))
 
 # Puzzle 2
 # A says "We are the same kind."
 # B says "We are of different kinds."
-knowledge2 = And(
+knowledge2 = intern(And(
     And(
         And(Or(AKnight, AKnave), Not((And(AKnave, AKnight)))),
         And(Or(BKnight, BKnave), Not((And(BKnight, BKnave)))),
@@ -51,14 +52,14 @@ knowledge2 = And(
             And(AKnave, BKnight),
         ),
     ),
-)
+))
 
 # Puzzle 3
 # A says either "I am a knight." or "I am a knave.", but you don't know which.
 # B says "A said 'I am a knave'."
 # B says "C is a knave."
 # C says "A is a knight."
-knowledge3 = And(
+knowledge3 = intern(And(
     And(
         And(Or(AKnight, AKnave), Not((And(AKnave, AKnight)))),
         And(Or(BKnight, BKnave), Not((And(BKnight, BKnave)))),
@@ -69,7 +70,7 @@ knowledge3 = And(
     ),
     Or(Biconditional(BKnight, CKnave), Biconditional(BKnave, Not(CKnave))),
     Or(Biconditional(CKnight, AKnight), Biconditional(CKnave, Not(AKnight))),
-)
+))
 
 
 def main():
@@ -85,8 +86,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
+            kb = KnowledgeBase(knowledge)
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if kb.entails(symbol):
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,506 @@
+"""
+CNF compilation and a CDCL SAT solver for logical sentences.
+
+`Encoder` turns `Sentence` trees into clauses with the Tseitin encoding:
+every compound subformula gets a fresh variable whose defining clauses
+make it equivalent to the subformula, so the CNF grows linearly with
+the sentence instead of exponentially. Clauses are lists of non-zero
+integer literals, where `v` and `-v` are a variable and its negation.
+
+`Solver` is a conflict-driven clause learning solver with two watched
+literals per clause, first-UIP learning, non-chronological
+backjumping, activity-based branching, phase saving and restarts.
+It can be given more clauses after solving and can solve under
+assumptions, keeping everything it has learned in between.
+
+`KnowledgeBase` pairs the two so that sentences can be added and many
+entailment queries asked without encoding anything twice.
+"""
+
+import heapq
+
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+
+class Encoder():
+    def __init__(self):
+        # Maps symbol names to variables, and variables back to names
+        self.variables = {}
+        self.names = [None]
+
+        # Maps already encoded subformulas to their literal
+        self.literals = {}
+
+        # Clauses produced since the last call to `take_clauses`
+        self.clauses = []
+
+    def new_variable(self, name=None):
+        """
+        Returns a fresh variable.
+        """
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def variable(self, name):
+        """
+        Returns the variable of the symbol called `name`.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.new_variable(name)
+        return self.variables[name]
+
+    def take_clauses(self):
+        """
+        Returns the clauses produced so far and forgets them.
+        """
+        clauses = self.clauses
+        self.clauses = []
+        return clauses
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding the clauses
+        that define any new Tseitin variables along the way.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, And):
+            operands = [self.literal(c) for c in sentence.conjuncts]
+            literal = self.gate(operands, conjunction=True)
+        elif isinstance(sentence, Or):
+            operands = [self.literal(d) for d in sentence.disjuncts]
+            literal = self.gate(operands, conjunction=False)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            literal = self.gate([-a, b], conjunction=False)
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            literal = self.new_variable()
+            self.clauses.extend([
+                [-literal, -a, b], [-literal, a, -b],
+                [literal, a, b], [literal, -a, -b],
+            ])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.literals[sentence] = literal
+        return literal
+
+    def gate(self, operands, conjunction):
+        """
+        Returns a literal equivalent to the conjunction (or disjunction)
+        of `operands`.
+        """
+        if len(operands) == 1:
+            return operands[0]
+
+        # An empty conjunction is true and an empty disjunction is false
+        if not operands:
+            literal = self.new_variable()
+            self.clauses.append([literal] if conjunction else [-literal])
+            return literal
+
+        # a ∨ b ∨ ... is ¬(¬a ∧ ¬b ∧ ...)
+        if not conjunction:
+            operands = [-operand for operand in operands]
+        literal = self.new_variable()
+        for operand in operands:
+            self.clauses.append([-literal, operand])
+        self.clauses.append([literal] + [-operand for operand in operands])
+        return literal if conjunction else -literal
+
+    def assert_sentence(self, sentence):
+        """
+        Adds clauses that make `sentence` true.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.assert_sentence(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(d) for d in sentence.disjuncts])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+class Solver():
+    def __init__(self):
+        # Per-variable state, indexed by variable (index 0 is unused)
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+
+        self.watches = {}
+        self.trail = []
+        self.trail_limits = []
+        self.queue_head = 0
+        self.heap = []
+        self.increment = 1.0
+
+        self.learnts = 0
+        self.conflicts = 0
+        self.model = None
+
+        # False once the clauses are unsatisfiable without assumptions
+        self.ok = True
+
+    def ensure(self, variable):
+        """
+        Makes room for variables up to `variable`.
+        """
+        while len(self.values) <= variable:
+            self.values.append(None)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.phases.append(False)
+            heapq.heappush(self.heap, (0.0, len(self.values) - 1))
+
+    def value(self, literal):
+        """
+        Returns True, False or None (unassigned) for a literal.
+        """
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def level(self):
+        return len(self.trail_limits)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = self.level()
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def add_clause(self, literals):
+        """
+        Adds a clause. Returns False if the clauses have become
+        unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+
+        # Make room for every variable, even if the clause is dropped,
+        # so that each one has a value in the model
+        literals = list(literals)
+        for literal in literals:
+            self.ensure(abs(literal))
+
+        clause = []
+        for literal in literals:
+            value = self.value(literal)
+            if value is True or -literal in clause:
+                return True
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.watch(clause)
+        return self.ok
+
+    def watch(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit propagation.
+        Returns a conflicting clause, or None.
+        """
+        while self.queue_head < len(self.trail):
+            false_literal = -self.trail[self.queue_head]
+            self.queue_head += 1
+            watchers = self.watches.get(false_literal)
+            if not watchers:
+                continue
+
+            kept = 0
+            i = 0
+            conflict = None
+            while i < len(watchers):
+                clause = watchers[i]
+                i += 1
+
+                # Keep the false literal in the second watched position
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if self.value(first) is True:
+                    watchers[kept] = clause
+                    kept += 1
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    watchers[kept] = clause
+                    kept += 1
+                    if self.value(first) is False:
+                        conflict = clause
+                        while i < len(watchers):
+                            watchers[kept] = watchers[i]
+                            kept += 1
+                            i += 1
+                    else:
+                        self.assign(first, clause)
+
+            del watchers[kept:]
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Derives the first-UIP clause from a conflict.
+        Returns the learned clause and the level to backjump to.
+        """
+        learnt = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+
+        while True:
+            for q in (clause if literal is None else clause[1:]):
+                variable = abs(q)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == self.level():
+                        pending += 1
+                    else:
+                        learnt.append(q)
+
+            # Walk back to the most recent literal involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            clause = self.reasons[abs(literal)]
+            pending -= 1
+            if pending == 0:
+                break
+
+        learnt[0] = -literal
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # Watch the literal that becomes unit after backjumping
+        deepest = max(range(1, len(learnt)),
+                      key=lambda i: self.levels[abs(learnt[i])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, self.levels[abs(learnt[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, len(self.values))
+                         if self.values[v] is None]
+            heapq.heapify(self.heap)
+        if self.values[variable] is None:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def cancel_until(self, level):
+        """
+        Undoes every assignment made above decision level `level`.
+        """
+        if self.level() <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = None
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.queue_head = len(self.trail)
+
+    def pick_branch(self):
+        """
+        Returns the unassigned variable with the highest activity,
+        or None if every variable is assigned.
+        """
+        while self.heap:
+            activity, variable = heapq.heappop(self.heap)
+            if (self.values[variable] is None
+                    and -activity == self.activity[variable]):
+                return variable
+        for variable in range(1, len(self.values)):
+            if self.values[variable] is None:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every literal
+        in `assumptions` true, leaving a satisfying assignment in
+        `model`, and False otherwise.
+        """
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+        for literal in assumptions:
+            self.ensure(abs(literal))
+
+        restart = 100
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if self.level() == 0:
+                    self.ok = False
+                    return False
+
+                learnt, level = self.analyze(conflict)
+                self.cancel_until(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.watch(learnt)
+                    self.learnts += 1
+                    self.assign(learnt[0], learnt)
+                self.increment /= 0.95
+
+                if conflicts >= restart:
+                    conflicts = 0
+                    restart = int(restart * 1.5)
+                    self.cancel_until(0)
+                continue
+
+            # Assumptions are decided first, one decision level each
+            if self.level() < len(assumptions):
+                literal = assumptions[self.level()]
+                value = self.value(literal)
+                if value is False:
+                    self.cancel_until(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.pick_branch()
+            if variable is None:
+                self.model = list(self.values)
+                self.cancel_until(0)
+                return True
+            self.trail_limits.append(len(self.trail))
+            phase = self.phases[variable]
+            self.assign(variable if phase else -variable, None)
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that keeps its encoding and solver, including every
+    learned clause, across sentences added and queries asked.
+    """
+
+    def __init__(self, *sentences):
+        self.encoder = Encoder()
+        self.solver = Solver()
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Adds `sentence` to the knowledge base.
+        """
+        self.encoder.assert_sentence(sentence)
+        self.flush()
+
+    def literal(self, sentence):
+        """
+        Returns the solver literal of `sentence`, encoding it if needed.
+        """
+        literal = self.encoder.literal(sentence)
+        self.flush()
+        return literal
+
+    def flush(self):
+        """
+        Hands any new clauses from the encoder to the solver.
+        """
+        for clause in self.encoder.take_clauses():
+            self.solver.add_clause(clause)
+
+    def entails(self, query, assumptions=()):
+        """
+        Checks if the knowledge base, together with the sentences in
+        `assumptions`, entails `query`.
+        """
+        literals = [self.literal(sentence) for sentence in assumptions]
+        return not self.solver.solve(literals + [-self.literal(query)])
+
+    def entailed_symbols(self, assumptions=()):
+        """
+        Returns a dictionary mapping every symbol whose value is entailed
+        by the knowledge base and `assumptions` to that value, or None
+        if they are inconsistent.
+        """
+        literals = [self.literal(sentence) for sentence in assumptions]
+        solver = self.solver
+        if not solver.solve(literals):
+            return None
+
+        # Every entailed value agrees with every model, so each model
+        # found rules out the candidates it disagrees with
+        candidates = {
+            variable: solver.model[variable]
+            for variable in self.encoder.variables.values()
+        }
+        entailed = {}
+        while candidates:
+            variable, value = candidates.popitem()
+            literal = variable if value else -variable
+            if not solver.solve(literals + [-literal]):
+                entailed[Symbol(self.encoder.names[variable])] = value
+                continue
+            for other in list(candidates):
+                if solver.model[other] != candidates[other]:
+                    del candidates[other]
+        return entailed
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that
+    knowledge ∧ ¬query is unsatisfiable.
+    """
+    encoder = Encoder()
+    encoder.assert_sentence(knowledge)
+    query = encoder.literal(query)
+
+    solver = Solver()
+    for clause in encoder.take_clauses():
+        if not solver.add_clause(clause):
+            return True
+    return not solver.solve([-query])
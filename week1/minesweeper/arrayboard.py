@@ -0,0 +1,121 @@
+"""
+Array-backed Minesweeper board for very large games
+
+`ArrayMinesweeper` keeps the `Minesweeper` API but stores the board as
+a NumPy boolean array. Mines are sampled without replacement in one
+call instead of by rejection, and every cell's count of nearby mines
+is computed up front by summing the eight shifted copies of the padded
+board, so `nearby_mines` is a lookup. `reveal` flood-fills the region
+opened by clicking a cell with no nearby mines.
+
+Usage: python arrayboard.py [height width mines]
+"""
+
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from minesweeper import Minesweeper
+
+
+class ArrayMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation backed by NumPy arrays
+    """
+
+    def __init__(self, height=8, width=8, mines=8, seed=None):
+        if not 0 <= mines <= height * width:
+            raise ValueError("mines must fit on the board")
+        self.height = height
+        self.width = width
+
+        # Place every mine at once, at distinct random cells
+        rng = np.random.default_rng(seed)
+        cells = rng.choice(height * width, mines, replace=False)
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[cells] = True
+
+        # Count the mines around every cell: each of the eight shifted
+        # views of the padded board adds one neighbor's mine
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.counts += padded[di:di + height, dj:dj + width]
+
+        self._mines = None
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    @property
+    def mines(self):
+        """
+        The set of mine cells, built the first time it is needed.
+        """
+        if self._mines is None:
+            self._mines = set(map(tuple, np.argwhere(self.board).tolist()))
+        return self._mines
+
+    def is_mine(self, cell):
+        return bool(self.board[cell])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        return int(self.counts[cell])
+
+    def reveal(self, cell):
+        """
+        Returns a dictionary mapping every cell revealed by clicking the
+        safe `cell` to its number of nearby mines. Clicking a cell with
+        no nearby mines also reveals all of its neighbors, and so on.
+        """
+        if self.is_mine(cell):
+            raise ValueError("Cell is a mine.")
+
+        revealed = {cell: self.nearby_mines(cell)}
+        queue = deque([cell])
+        while queue:
+            i, j = queue.popleft()
+            if revealed[(i, j)] != 0:
+                continue
+            for ni in range(max(0, i - 1), min(self.height, i + 2)):
+                for nj in range(max(0, j - 1), min(self.width, j + 2)):
+                    if (ni, nj) not in revealed:
+                        revealed[(ni, nj)] = int(self.counts[ni, nj])
+                        queue.append((ni, nj))
+        return revealed
+
+
+def main():
+    if len(sys.argv) not in [1, 4]:
+        sys.exit("Usage: python arrayboard.py [height width mines]")
+    if len(sys.argv) == 4:
+        height, width, mines = map(int, sys.argv[1:])
+    else:
+        height, width, mines = 1000, 1000, 150000
+
+    start = time.perf_counter()
+    game = ArrayMinesweeper(height, width, mines, seed=0)
+    print(f"Built {height}x{width} board with {mines} mines "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Click the first cell with no nearby mines
+    zeros = np.argwhere((game.counts == 0) & ~game.board)
+    if len(zeros):
+        cell = tuple(zeros[0].tolist())
+        start = time.perf_counter()
+        revealed = game.reveal(cell)
+        print(f"Revealed {len(revealed)} cells from {cell} "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import itertools
 import random
 import copy
 
+import probability
+
 
 class Minesweeper:
     """
@@ -141,11 +143,14 @@ class MinesweeperAI:
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None):
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Number of mines on the board, if known
+        self.mine_count = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -305,16 +310,208 @@ class MinesweeperAI:
             return i
         return None
 
+    def constraints(self):
+        """
+        Returns the knowledge as a list of (cells, count) pairs.
+        """
+        return [
+            (sentence.cells, sentence.count) for sentence in self.knowledge
+        ]
+
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        Picks among the cells least likely to be a mine given the
+        knowledge, and returns None only if there is no such cell.
         """
+        unknown = [
+            (i, j)
+            for i in range(self.height)
+            for j in range(self.width)
+            if (i, j) not in self.moves_made and (i, j) not in self.mines
+            and (i, j) not in self.safes
+        ]
+        if not unknown:
+            return None
+
+        mines = None
+        if self.mine_count is not None:
+            mines = self.mine_count - len(self.mines)
+        probabilities = probability.mine_probabilities(
+            self.constraints(), unknown, mines
+        )
+        lowest = min(probabilities.values())
+        return random.choice([
+            cell for cell in unknown
+            if probabilities[cell] <= lowest + 1e-9
+        ])
+
+
+class PropagationAI(MinesweeperAI):
+    """
+    Minesweeper game player that infers by constraint propagation.
+
+    Sentences are indexed by the cells they mention, and only sentences
+    that have changed are re-examined, against the sentences sharing a
+    cell with them, so each update costs time proportional to the
+    sentences it affects rather than to the whole knowledge base.
+    """
+
+    def __init__(self, height=8, width=8, mines=None):
+        super().__init__(height, width, mines)
+
+        # Maps sentence ids to sentences, and each cell to the ids of
+        # the sentences that mention it
+        self.knowledge = {}
+        self.index = {}
+        self.next_id = 0
 
-        i = random.randrange(self.height)
-        j = random.randrange(self.width)
-        if (i, j) not in self.moves_made and (i, j) not in self.mines:
-            return (i, j)
+        # Maps (cells, count) to the id of the sentence saying it
+        self.known = {}
+
+        # Ids of sentences changed since they were last examined
+        self.dirty = []
+
+        # Cells known to be safe that have not been played yet
+        self.safe_moves = set()
+
+    def neighbors(self, cell):
+        """
+        Returns the cells next to `cell` on the board.
+        """
+        i, j = cell
+        return [
+            (ni, nj)
+            for ni in range(max(0, i - 1), min(self.height, i + 2))
+            for nj in range(max(0, j - 1), min(self.width, j + 2))
+            if (ni, nj) != cell
+        ]
+
+    def add_sentence(self, cells, count):
+        """
+        Adds the sentence that `count` of `cells` are mines,
+        unless it is empty or already known.
+        """
+        key = (frozenset(cells), count)
+        if not cells or key in self.known:
+            return
+        sentence_id = self.next_id
+        self.next_id += 1
+        self.knowledge[sentence_id] = Sentence(cells, count)
+        self.known[key] = sentence_id
+        for cell in cells:
+            self.index.setdefault(cell, set()).add(sentence_id)
+        self.dirty.append(sentence_id)
+
+    def remove_sentence(self, sentence_id):
+        sentence = self.knowledge.pop(sentence_id)
+        del self.known[(frozenset(sentence.cells), sentence.count)]
+        for cell in sentence.cells:
+            self.index[cell].discard(sentence_id)
+
+    def resolve(self, cell, mine):
+        """
+        Removes a cell whose state is now known from every sentence
+        that mentions it.
+        """
+        for sentence_id in self.index.pop(cell, ()):
+            sentence = self.knowledge[sentence_id]
+            del self.known[(frozenset(sentence.cells), sentence.count)]
+            if mine:
+                sentence.mark_mine(cell)
+            else:
+                sentence.mark_safe(cell)
+
+            key = (frozenset(sentence.cells), sentence.count)
+            if key in self.known:
+                # Now says the same as another sentence: drop it
+                self.knowledge.pop(sentence_id)
+                for other in sentence.cells:
+                    self.index[other].discard(sentence_id)
+            else:
+                self.known[key] = sentence_id
+                self.dirty.append(sentence_id)
+
+    def mark_mine(self, cell):
+        if cell in self.mines:
+            return
+        self.mines.add(cell)
+        self.resolve(cell, mine=True)
+
+    def mark_safe(self, cell):
+        if cell in self.safes:
+            return
+        self.safes.add(cell)
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        self.resolve(cell, mine=False)
+
+    def add_knowledge(self, cell, count):
+        self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
+        self.mark_safe(cell)
+
+        cells = set()
+        for neighbor in self.neighbors(cell):
+            if neighbor in self.mines:
+                count -= 1
+            elif neighbor not in self.safes:
+                cells.add(neighbor)
+        self.add_sentence(cells, count)
+        self.propagate()
+
+    def propagate(self):
+        """
+        Examines changed sentences until no more can be inferred.
+        """
+        while self.dirty:
+            sentence_id = self.dirty.pop()
+            sentence = self.knowledge.get(sentence_id)
+            if sentence is None:
+                continue
+
+            if not sentence.cells:
+                self.remove_sentence(sentence_id)
+            elif sentence.count == 0:
+                for cell in list(sentence.cells):
+                    self.mark_safe(cell)
+            elif sentence.count == len(sentence.cells):
+                for cell in list(sentence.cells):
+                    self.mark_mine(cell)
+            else:
+                self.subsets(sentence_id, sentence)
+
+    def subsets(self, sentence_id, sentence):
+        """
+        Compares a sentence with every sentence sharing a cell with it,
+        adding the difference between any two where one's cells are a
+        subset of the other's.
+        """
+        others = set()
+        for cell in sentence.cells:
+            others |= self.index[cell]
+        others.discard(sentence_id)
+
+        for other_id in others:
+            other = self.knowledge[other_id]
+            if sentence.cells < other.cells:
+                self.add_sentence(other.cells - sentence.cells,
+                                  other.count - sentence.count)
+            elif other.cells < sentence.cells:
+                self.add_sentence(sentence.cells - other.cells,
+                                  sentence.count - other.count)
+
+    def constraints(self):
+        return [
+            (sentence.cells, sentence.count)
+            for sentence in self.knowledge.values()
+        ]
+
+    def make_safe_move(self):
+        for cell in self.safe_moves:
+            return cell
         return None
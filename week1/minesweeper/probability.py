@@ -0,0 +1,398 @@
+"""
+Mine probabilities for Minesweeper cells
+
+The constraints known about a board split its unknown cells into
+independent components of cells linked by shared constraints, plus the
+unconstrained interior. For each component, `count_solutions` counts
+its consistent mine assignments by how many mines they use, with a
+backtracking search memoized on the constraints that are still open.
+`mine_probabilities` then weights the combinations of component
+solutions by the number of ways to place the remaining mines in the
+interior, which gives every cell's exact probability of being a mine.
+
+Components that take too long to count are sampled instead, which
+gives approximate probabilities; all sampling on a board shares one
+more TIME_LIMIT.
+"""
+
+import math
+import random
+import time
+
+# Seconds allowed for counting one board's solutions exactly
+TIME_LIMIT = 0.5
+
+# Consistent assignments drawn from a component too big to count
+SAMPLES = 200
+
+# Counted components by constraints, reused while the frontier is unchanged
+cache = {}
+CACHE_SIZE = 10000
+
+
+class Timeout(Exception):
+    pass
+
+
+def components(constraints):
+    """
+    Splits `constraints`, a list of (cells, count) pairs, into lists of
+    constraints that share cells with one another.
+    """
+    by_cell = {}
+    for c, (cells, count) in enumerate(constraints):
+        for cell in cells:
+            by_cell.setdefault(cell, []).append(c)
+
+    seen = set()
+    groups = []
+    for start in range(len(constraints)):
+        if start in seen:
+            continue
+        seen.add(start)
+        group = []
+        stack = [start]
+        while stack:
+            c = stack.pop()
+            group.append(constraints[c])
+            for cell in constraints[c][0]:
+                for other in by_cell[cell]:
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+        groups.append(group)
+    return groups
+
+
+def order_cells(constraints):
+    """
+    Returns the cells of `constraints` in breadth-first order through
+    shared constraints, so that few constraints are open at a time.
+    """
+    by_cell = {}
+    for c, (cells, count) in enumerate(constraints):
+        for cell in cells:
+            by_cell.setdefault(cell, []).append(c)
+
+    order = []
+    seen = set()
+    for start in sorted(by_cell):
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = [start]
+        for cell in queue:
+            order.append(cell)
+            for c in by_cell[cell]:
+                for other in sorted(constraints[c][0]):
+                    if other not in seen:
+                        seen.add(other)
+                        queue.append(other)
+    return order
+
+
+def count_solutions(constraints, deadline):
+    """
+    Counts the mine assignments to the cells of `constraints` that
+    satisfy all of them. Returns the cells and a dictionary mapping each
+    number of mines k to the number of solutions with k mines and, for
+    each cell, how many of those make it a mine.
+
+    Raises Timeout if this is still running at `deadline`.
+    """
+    cells = order_cells(constraints)
+    position = {cell: i for i, cell in enumerate(cells)}
+    n = len(cells)
+
+    # The constraints each cell belongs to, and the constraints that
+    # have cells on both sides of position i; only their remaining mine
+    # counts affect how cells i onwards can be assigned
+    cell_constraints = [[] for _ in range(n)]
+    first = []
+    last = []
+    for c, (constraint_cells, count) in enumerate(constraints):
+        positions = [position[cell] for cell in constraint_cells]
+        for i in positions:
+            cell_constraints[i].append(c)
+        first.append(min(positions))
+        last.append(max(positions))
+
+    # Sweep the positions, opening each constraint after its first cell
+    # and closing it after its last
+    opening = [[] for _ in range(n + 1)]
+    closing = [[] for _ in range(n + 1)]
+    for c in range(len(constraints)):
+        opening[first[c] + 1].append(c)
+        closing[last[c] + 1].append(c)
+    open_at = []
+    current = set()
+    for i in range(n + 1):
+        current.update(opening[i])
+        current.difference_update(closing[i])
+        open_at.append(sorted(current))
+
+    need = [count for cells_, count in constraints]
+    left = [len(cells_) for cells_, count in constraints]
+    memo = {}
+
+    def assign(i, value):
+        """
+        Places `value` mines in cell i and returns whether every
+        constraint of the cell can still be met.
+        """
+        feasible = True
+        for c in cell_constraints[i]:
+            need[c] -= value
+            left[c] -= 1
+            if need[c] < 0 or need[c] > left[c]:
+                feasible = False
+        return feasible
+
+    def unassign(i, value):
+        for c in cell_constraints[i]:
+            need[c] += value
+            left[c] += 1
+
+    # Depth-first search with an explicit stack, since a component can
+    # have more cells than Python allows nested calls. Each frame is
+    # [i, memo key, next value to try, result], and its result maps
+    # {k: [solutions, mines per cell from i on]} for cells i onwards,
+    # given the mines already placed in cells before i
+    frames = []
+
+    def enter(i):
+        """
+        Returns the result for cells i onwards if it is already known,
+        or pushes a frame to compute it and returns None.
+        """
+        if i == n:
+            return {0: [1, []]}
+        key = (i, tuple(need[c] for c in open_at[i]))
+        if key in memo:
+            return memo[key]
+        if time.perf_counter() > deadline:
+            raise Timeout
+        frames.append([i, key, 0, {}])
+        return None
+
+    returned = enter(0)
+    while frames:
+        frame = frames[-1]
+        i, key, value, result = frame
+
+        # Add the solutions found after placing the previous value
+        if returned is not None:
+            placed = value - 1
+            for k, (count, mines) in returned.items():
+                entry = result.setdefault(k + placed, [0, [0] * (n - i)])
+                entry[0] += count
+                entry[1][0] += placed * count
+                for j, m in enumerate(mines, 1):
+                    entry[1][j] += m
+            unassign(i, placed)
+            returned = None
+
+        if value == 2:
+            frames.pop()
+            memo[key] = returned = result
+            continue
+        frame[2] = value + 1
+        if assign(i, value):
+            returned = enter(i + 1)
+        else:
+            unassign(i, value)
+
+    return cells, returned
+
+
+def sample_solutions(constraints, samples, deadline, rng):
+    """
+    Like `count_solutions`, but counts up to `samples` solutions found
+    by randomized backtracking, for components too big to count.
+    """
+    cells = order_cells(constraints)
+    position = {cell: i for i, cell in enumerate(cells)}
+    n = len(cells)
+    cell_constraints = [[] for _ in range(n)]
+    for c, (constraint_cells, count) in enumerate(constraints):
+        for cell in constraint_cells:
+            cell_constraints[position[cell]].append(c)
+
+    need = [count for cells_, count in constraints]
+    left = [len(cells_) for cells_, count in constraints]
+    assignment = [0] * n
+    result = {}
+
+    def assign(i, value):
+        feasible = True
+        for c in cell_constraints[i]:
+            need[c] -= value
+            left[c] -= 1
+            if need[c] < 0 or need[c] > left[c]:
+                feasible = False
+        assignment[i] = value
+        return feasible
+
+    def unassign(i):
+        for c in cell_constraints[i]:
+            need[c] += assignment[i]
+            left[c] += 1
+
+    def sample():
+        """
+        Assigns the cells in order, trying each cell's two values in a
+        random order and backtracking on a contradiction, and records
+        the first solution found. Returns False if there is none.
+        """
+        # The values still to try for each cell up to i
+        choices = [None] * n
+        i = 0
+        if n:
+            choices[0] = rng.sample((0, 1), 2)
+        while i < n:
+            if time.perf_counter() > deadline:
+                raise Timeout
+            if not choices[i]:
+                if i == 0:
+                    return False
+                i -= 1
+                unassign(i)
+                continue
+            if assign(i, choices[i].pop()):
+                i += 1
+                if i < n:
+                    choices[i] = rng.sample((0, 1), 2)
+            else:
+                unassign(i)
+
+        entry = result.setdefault(sum(assignment), [0, [0] * n])
+        entry[0] += 1
+        for j in range(n):
+            entry[1][j] += assignment[j]
+            unassign(j)
+        return True
+
+    try:
+        for _ in range(samples):
+            sample()
+    except Timeout:
+        pass
+    return cells, result
+
+
+def convolve(a, b):
+    """
+    Multiplies two polynomials given as {exponent: coefficient}.
+    """
+    product = {}
+    for i, x in a.items():
+        for j, y in b.items():
+            product[i + j] = product.get(i + j, 0) + x * y
+    return product
+
+
+def mine_probabilities(constraints, unknown, mines=None,
+                       time_limit=TIME_LIMIT, rng=random):
+    """
+    Returns a dictionary mapping each cell in `unknown` to its
+    probability of being a mine, given `constraints`, a list of
+    (cells, count) pairs over unknown cells, and the number of `mines`
+    left among the unknown cells, if known.
+    """
+    deadline = time.perf_counter() + time_limit
+    unknown = set(unknown)
+    constraints = [
+        (frozenset(cells), count) for cells, count in constraints if cells
+    ]
+
+    # Count each component's solutions, sampling any that take too long;
+    # every sampled component shares one more `time_limit` in total
+    counted = []
+    sampling_deadline = None
+    for group in components(constraints):
+        key = frozenset(group)
+        if key not in cache:
+            try:
+                counted.append(count_solutions(group, deadline))
+            except Timeout:
+                if sampling_deadline is None:
+                    sampling_deadline = time.perf_counter() + time_limit
+                cells, solutions = sample_solutions(
+                    group, SAMPLES, sampling_deadline, rng
+                )
+                # With no sample at all, treat the cells as unconstrained
+                if solutions:
+                    counted.append((cells, solutions))
+                continue
+            if len(cache) >= CACHE_SIZE:
+                cache.clear()
+            cache[key] = counted[-1]
+        else:
+            counted.append(cache[key])
+
+    frontier = set()
+    for cells, solutions in counted:
+        frontier.update(cells)
+    interior = len(unknown - frontier)
+    polynomials = [
+        {k: entry[0] for k, entry in solutions.items()}
+        for cells, solutions in counted
+    ]
+
+    def interior_ways(k):
+        """
+        Returns the ways to place the mines not in the frontier when
+        the frontier holds `k`.
+        """
+        if mines is None:
+            return 1
+        if not 0 <= mines - k <= interior:
+            return 0
+        return math.comb(interior, mines - k)
+
+    # Products of every component's polynomial but one
+    prefix = [{0: 1}]
+    for polynomial in polynomials:
+        prefix.append(convolve(prefix[-1], polynomial))
+    suffix = [{0: 1}]
+    for polynomial in reversed(polynomials):
+        suffix.append(convolve(suffix[-1], polynomial))
+    suffix.reverse()
+
+    total = sum(w * interior_ways(k) for k, w in prefix[-1].items())
+    if total == 0:
+        # The mine count contradicts the constraints: ignore it
+        if mines is not None:
+            return mine_probabilities(constraints, unknown, None,
+                                      time_limit, rng)
+        return {cell: 0.5 for cell in unknown}
+
+    probabilities = {}
+    for c, (cells, solutions) in enumerate(counted):
+        others = convolve(prefix[c], suffix[c + 1])
+        ways = {
+            k: sum(w * interior_ways(k + other) for other, w in others.items())
+            for k in solutions
+        }
+        weighted = [0] * len(cells)
+        for k, (count, cell_mines) in solutions.items():
+            for j, m in enumerate(cell_mines):
+                weighted[j] += m * ways[k]
+        for cell, weight in zip(cells, weighted):
+            probabilities[cell] = weight / total
+
+    if interior:
+        if mines is None:
+            # Without a mine count, assume the frontier's average density
+            density = (sum(probabilities.values()) / len(probabilities)
+                       if probabilities else 0.5)
+        else:
+            expected = sum(
+                w * interior_ways(k) * (mines - k)
+                for k, w in prefix[-1].items()
+            )
+            # Divide exact integers once: either alone overflows a float
+            density = expected / (interior * total)
+        for cell in unknown - frontier:
+            probabilities[cell] = density
+    return probabilities
@@ -0,0 +1,192 @@
+"""
+Headless Minesweeper games between an AI and a random board.
+
+Each move is the AI's safe move if it knows one and a random move
+otherwise, as in runner.py, and is timed together with the knowledge
+update that follows it. Games are seeded, so every AI plays the same
+boards, and are spread across a process pool. The report gives win
+rates, moves per game and per-move latency percentiles for each AI,
+and can be written to a JSON file and compared against an earlier one.
+
+Usage: python simulate.py [--games 20] [--height 16] [--width 30]
+                          [--mines 99 | --density 0.2]
+                          [--ai propagation original] [--seed 0]
+                          [--processes N] [--output results.json]
+                          [--compare previous.json]
+"""
+
+import argparse
+import json
+import random
+import time
+from multiprocessing import Pool
+
+from minesweeper import Minesweeper, MinesweeperAI, PropagationAI
+
+AIS = {"original": MinesweeperAI, "propagation": PropagationAI}
+
+# Games per pool task
+CHUNK = 10
+
+
+def play_game(ai_class, height, width, mines, seed):
+    """
+    Plays one game and returns whether the AI won, how many moves it
+    made, how many of them were random, and each move's latency.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = ai_class(height=height, width=width, mines=mines)
+    remaining = height * width - mines
+    latencies = []
+    guesses = 0
+
+    while remaining:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            guesses += 1
+            move = ai.make_random_move()
+        if game.is_mine(move):
+            latencies.append(time.perf_counter() - start)
+            return False, len(latencies), guesses, latencies
+
+        ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - start)
+        remaining -= 1
+
+    return True, len(latencies), guesses, latencies
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of sorted `values`, or 0 if empty.
+    """
+    if not values:
+        return 0
+    return values[min(len(values) - 1, len(values) * p // 100)]
+
+
+def run_games(task):
+    """
+    Pool worker: plays `count` games with seeds from `seed` on.
+    Returns a record of each game and every move's latency.
+    """
+    name, height, width, mines, seed, count = task
+    games = []
+    latencies = []
+    for game_seed in range(seed, seed + count):
+        won, moves, guesses, game_latencies = play_game(
+            AIS[name], height, width, mines, game_seed
+        )
+        games.append({
+            "seed": game_seed, "won": won,
+            "moves": moves, "guesses": guesses,
+        })
+        latencies.extend(game_latencies)
+    return games, latencies
+
+
+def simulate(names, games, height, width, mines, seed, processes):
+    """
+    Plays `games` games with each AI and returns a summary of each.
+    """
+    results = {}
+    with Pool(processes) as pool:
+        for name in names:
+            tasks = [
+                (name, height, width, mines, seed + start,
+                 min(CHUNK, games - start))
+                for start in range(0, games, CHUNK)
+            ]
+            start = time.perf_counter()
+            chunks = pool.map(run_games, tasks)
+            elapsed = time.perf_counter() - start
+
+            records = [game for chunk in chunks for game in chunk[0]]
+            latencies = sorted(
+                latency for chunk in chunks for latency in chunk[1]
+            )
+            results[name] = {
+                "games": len(records),
+                "win_rate": sum(game["won"] for game in records) / games,
+                "moves": sum(game["moves"] for game in records) / games,
+                "guesses": sum(game["guesses"] for game in records) / games,
+                "latency_ms": {
+                    f"p{p}": percentile(latencies, p) * 1000
+                    for p in [50, 90, 99, 100]
+                },
+                "seconds": elapsed,
+                "records": records,
+            }
+    return results
+
+
+def report(results, previous=None):
+    """
+    Prints a summary of each AI's results, with the win rate and
+    median latency of `previous` results for the same AI if given.
+    """
+    print(f"{'ai':>12} {'games':>6} {'won':>6} {'moves':>7} {'guesses':>8} "
+          f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'games/s':>8}")
+    for name, result in results.items():
+        latency = result["latency_ms"]
+        print(f"{name:>12} {result['games']:>6} {result['win_rate']:>6.0%} "
+              f"{result['moves']:>7.1f} {result['guesses']:>8.1f} "
+              + " ".join(f"{latency[p]:>8.3f}"
+                         for p in ["p50", "p90", "p99", "p100"])
+              + f" {result['games'] / result['seconds']:>8.1f}")
+        if previous and name in previous:
+            before = previous[name]
+            print(f"{'was':>12} {before['games']:>6} "
+                  f"{before['win_rate']:>6.0%} {before['moves']:>7.1f} "
+                  f"{before['guesses']:>8.1f} "
+                  f"{before['latency_ms']['p50']:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games with the AI."
+    )
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--height", type=int, default=16)
+    parser.add_argument("--width", type=int, default=30)
+    mines = parser.add_mutually_exclusive_group()
+    mines.add_argument("--mines", type=int, default=99)
+    mines.add_argument("--density", type=float,
+                       help="fraction of cells that are mines")
+    parser.add_argument("--ai", nargs="+", choices=list(AIS),
+                        default=["propagation"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare",
+                        help="compare with results from an earlier run")
+    args = parser.parse_args()
+
+    mines = args.mines
+    if args.density is not None:
+        mines = round(args.density * args.height * args.width)
+    if not 0 < mines < args.height * args.width:
+        parser.error("there must be at least one mine and one safe cell")
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+
+    results = simulate(args.ai, args.games, args.height, args.width, mines,
+                       args.seed, args.processes)
+    report(results, previous)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "height": args.height, "width": args.width, "mines": mines,
+                "games": args.games, "seed": args.seed, "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Parallel, incremental crawler for large corpora
+
+HTML files are parsed across a process pool, each read in fixed-size
+chunks so that memory stays bounded however large a page is. The links
+found are written to a compact binary index next to the corpus: every
+page or link name is stored once and referred to by a 32-bit id, and
+each page records the mtime and size of its file. Crawling the
+directory again only re-parses files whose mtime or size changed and
+reuses every other page's links from the index.
+
+Usage: python crawler.py corpus [--processes N] [--index path]
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from multiprocessing import Pool
+
+FILENAME = "links.index"
+MAGIC = b"PRLINKS\0"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+LENGTH = struct.Struct("<q")
+ALIGNMENT = 8
+BYTEORDER = 0 if sys.byteorder == "little" else 1
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Bytes read from a file at a time
+CHUNK = 1 << 16
+
+# Fewest changed files worth starting a process pool for
+PARALLEL = 64
+
+# Bytes kept from the end of one chunk for the next, so that a link tag
+# split between two chunks is still found if it is shorter than this
+OVERLAP = 4096
+
+
+class LinkIndex():
+    """
+    Links of a crawled corpus. `names[i]` is the name with id i, and
+    page `pages[p]` (a name id) has links to the names with ids
+    `links[offsets[p]:offsets[p + 1]]`, recorded when its file had
+    mtime `stats[2 * p]` (in nanoseconds) and size `stats[2 * p + 1]`.
+    """
+
+    def __init__(self, names, pages, stats, offsets, links):
+        self.names = names
+        self.pages = pages
+        self.stats = stats
+        self.offsets = offsets
+        self.links = links
+
+    def page_links(self, p):
+        """
+        Returns the name ids that page `p` links to.
+        """
+        return self.links[self.offsets[p]:self.offsets[p + 1]]
+
+    def edges(self):
+        """
+        Returns the page names, and the sources and targets of every
+        link between two different pages, as positions in that list.
+        """
+        position = {name: p for p, name in enumerate(self.pages)}
+        sources = array("i")
+        targets = array("i")
+        for p in range(len(self.pages)):
+            for link in self.page_links(p):
+                target = position.get(link)
+                if target is not None and target != p:
+                    sources.append(p)
+                    targets.append(target)
+        return [self.names[name] for name in self.pages], sources, targets
+
+    def corpus(self):
+        """
+        Returns the corpus dictionary that `pagerank.crawl` would.
+        """
+        pages, sources, targets = self.edges()
+        corpus = {page: set() for page in pages}
+        for source, target in zip(sources, targets):
+            corpus[pages[source]].add(pages[target])
+        return corpus
+
+
+def extract_links(path):
+    """
+    Returns the set of links in the HTML file at `path`,
+    reading it a chunk at a time.
+    """
+    links = set()
+    buffer = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK)
+            buffer += chunk
+
+            # Until the end of the file, a match starting in the last
+            # OVERLAP bytes may be cut short, so leave it for next time
+            limit = len(buffer) - OVERLAP if chunk else len(buffer)
+            end = 0
+            for match in LINK.finditer(buffer):
+                if match.start() >= limit:
+                    break
+                links.add(match.group(1).decode("utf-8", "replace"))
+                end = match.end()
+            if not chunk:
+                return links
+            buffer = buffer[max(end, limit, 0):]
+
+
+def parse(path):
+    """
+    Pool worker: returns the links in the file at `path`, other than
+    to the file itself.
+    """
+    return extract_links(path) - {os.path.basename(path)}
+
+
+def encode_names(names):
+    """
+    Returns the byte offsets and blob of NUL-terminated UTF-8 names.
+    """
+    offsets = array("q", [0])
+    chunks = []
+    for name in names:
+        chunk = name.encode("utf-8") + b"\0"
+        chunks.append(chunk)
+        offsets.append(offsets[-1] + len(chunk))
+    return offsets, b"".join(chunks)
+
+
+def save(path, index):
+    """
+    Writes `index` to `path`.
+    """
+    sections = [*encode_names(index.names), index.pages, index.stats,
+                index.offsets, index.links]
+
+    # Write to a temporary file first so readers never see half an index
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, BYTEORDER))
+            for section in sections:
+                if not isinstance(section, bytes):
+                    section = section.tobytes()
+                f.write(LENGTH.pack(len(section)))
+                f.write(section)
+                f.write(bytes(-len(section) % ALIGNMENT))
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def load(path):
+    """
+    Memory-maps the index at `path`.
+    Returns a `LinkIndex`, or None if there is no usable index.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = memoryview(
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            )
+        magic, version, byteorder = HEADER.unpack_from(data)
+    except (OSError, ValueError, struct.error):
+        return None
+    if magic != MAGIC or version != VERSION or byteorder != BYTEORDER:
+        return None
+
+    sections = []
+    position = HEADER.size
+    while position < len(data):
+        length, = LENGTH.unpack_from(data, position)
+        position += LENGTH.size
+        sections.append(data[position:position + length])
+        position += length + (-length % ALIGNMENT)
+
+    name_offsets, blob, pages, stats, offsets, links = sections
+    name_offsets = name_offsets.cast("q")
+    blob = bytes(blob)
+    names = [
+        blob[name_offsets[i]:name_offsets[i + 1] - 1].decode("utf-8")
+        for i in range(len(name_offsets) - 1)
+    ]
+    return LinkIndex(names, pages.cast("i"), stats.cast("q"),
+                     offsets.cast("q"), links.cast("i"))
+
+
+def build(directory, processes=None, path=None):
+    """
+    Crawls `directory`, reusing the links of unchanged files from the
+    index at `path` (the corpus's own by default), and writes the new
+    index there if it can. Returns the new `LinkIndex` and how many files were
+    parsed and reused.
+    """
+    if path is None:
+        path = os.path.join(directory, FILENAME)
+    previous = load(path)
+    recorded = {}
+    if previous is not None:
+        for p, name in enumerate(previous.pages):
+            recorded[previous.names[name]] = p
+
+    files = []
+    changed = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".html") and entry.is_file():
+                stat = entry.stat()
+                files.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    files.sort()
+
+    # Files whose mtime and size match the index keep their links
+    reused = {}
+    for filename, mtime, size in files:
+        p = recorded.get(filename)
+        if (p is not None and previous.stats[2 * p] == mtime
+                and previous.stats[2 * p + 1] == size):
+            reused[filename] = p
+        else:
+            changed.append(os.path.join(directory, filename))
+
+    # Intern every page and link name as a small integer id
+    ids = {}
+    names = []
+
+    def intern(name):
+        if name not in ids:
+            ids[name] = len(names)
+            names.append(name)
+        return ids[name]
+
+    pages = array("i")
+    stats = array("q")
+    offsets = array("q", [0])
+    links = array("i")
+    pool = Pool(processes) if len(changed) >= PARALLEL else None
+    try:
+        parsed = (pool.imap(parse, changed, chunksize=16) if pool
+                  else map(parse, changed))
+        for filename, mtime, size in files:
+            if filename in reused:
+                page_links = [
+                    previous.names[link]
+                    for link in previous.page_links(reused[filename])
+                ]
+            else:
+                page_links = sorted(next(parsed))
+            pages.append(intern(filename))
+            stats.extend([mtime, size])
+            links.extend(intern(link) for link in page_links)
+            offsets.append(len(links))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    index = LinkIndex(names, pages, stats, offsets, links)
+    try:
+        save(path, index)
+    except OSError as e:
+        print(f"Could not write link index: {e}", file=sys.stderr)
+    return index, len(changed), len(reused)
+
+
+def crawl(directory, processes=None):
+    """
+    Parse a directory of HTML pages and check for links to other pages.
+    Return a dictionary where each key is a page, and values are
+    a list of all other pages in the corpus that are linked to by the page.
+    """
+    index, parsed, reused = build(directory, processes)
+    return index.corpus()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crawl a corpus of HTML pages into a link index."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--index", help=f"index path (corpus/{FILENAME})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index, parsed, reused = build(args.corpus, args.processes, args.index)
+    print(f"{len(index.pages)} pages ({parsed} parsed, {reused} reused), "
+          f"{len(index.links)} links, {len(index.names)} names "
+          f"in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
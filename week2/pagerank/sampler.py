@@ -0,0 +1,123 @@
+"""
+Vectorized random-surfer sampling for PageRank
+
+Rather than building a distribution over the whole corpus for every
+sample, many independent surfers walk at once. Each step draws, for
+every surfer, whether it follows a link, and then either a uniformly
+random page or a uniformly random link of its page, read from an
+out-link CSR array. Every step is a few NumPy operations over all
+surfers, and the pages visited are tallied with `np.bincount`. Each
+surfer takes BURN_IN steps before its samples are counted, so that the
+uniformly random start does not bias the estimate.
+
+Usage: python sampler.py corpus [samples]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from pagerank import DAMPING, crawl
+
+# Most surfers walking at once
+WALKERS = 1000000
+
+# Fewest samples each surfer takes. Longer walks mean fewer surfers to
+# burn in, so the burn-in costs a smaller share of the samples
+WALK_LENGTH = 1000
+
+# Steps each surfer takes before its samples are counted, so that its
+# distribution has forgotten the uniformly random starting page: the
+# difference shrinks by the damping factor at every step
+BURN_IN = 100
+
+
+def out_links(corpus):
+    """
+    Returns the corpus's sorted pages and its out-link CSR arrays:
+    page p links to pages links[indptr[p]:indptr[p + 1]].
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    degrees = [len(corpus[page]) for page in pages]
+    indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum(degrees, out=indptr[1:])
+    links = np.fromiter(
+        (index[link] for page in pages for link in sorted(corpus[page])),
+        dtype=np.int64, count=int(indptr[-1])
+    )
+    return pages, indptr, links
+
+
+def walk(indptr, links, damping_factor, n, walkers=WALKERS, seed=None):
+    """
+    Takes `n` samples with surfers walking the graph in `indptr` and
+    `links` and returns how many times each page was sampled.
+    """
+    rng = np.random.default_rng(seed)
+    pages = len(indptr) - 1
+    degrees = np.diff(indptr)
+    walkers = max(1, min(walkers, n // WALK_LENGTH))
+
+    def step(positions):
+        """
+        Returns where the surfers at `positions` go next. Surfers on
+        pages with links follow one with probability `damping_factor`;
+        every other surfer jumps to a random page.
+        """
+        following = ((rng.random(walkers) < damping_factor)
+                     & (degrees[positions] > 0))
+        sources = positions[following]
+        offsets = rng.random(len(sources)) * degrees[sources]
+        positions = rng.integers(0, pages, walkers)
+        positions[following] = links[indptr[sources]
+                                     + offsets.astype(np.int64)]
+        return positions
+
+    positions = rng.integers(0, pages, walkers)
+    for _ in range(BURN_IN):
+        positions = step(positions)
+
+    counts = np.zeros(pages, dtype=np.int64)
+    remaining = n
+    while True:
+        taken = min(walkers, remaining)
+        counts += np.bincount(positions[:taken], minlength=pages)
+        remaining -= taken
+        if not remaining:
+            return counts
+        positions = step(positions)
+
+
+def sample_pagerank(corpus, damping_factor, n, seed=None):
+    """
+    Return PageRank values for each page by sampling `n` pages
+    according to transition model, starting with a page at random.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages, indptr, links = out_links(corpus)
+    counts = walk(indptr, links, damping_factor, n, seed=seed)
+    return dict(zip(pages, (counts / n).tolist()))
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python sampler.py corpus [samples]")
+    samples = int(sys.argv[2]) if len(sys.argv) == 3 else 10 ** 7
+    corpus = crawl(sys.argv[1])
+
+    start = time.perf_counter()
+    ranks = sample_pagerank(corpus, DAMPING, samples)
+    elapsed = time.perf_counter() - start
+    print(f"PageRank Results from Sampling (n = {samples}, "
+          f"{elapsed:.2f} s)")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Sparse power iteration for PageRank
+
+`LinkGraph` stores the corpus once as a compressed sparse row (CSR)
+matrix of in-links: for every page, the pages linking to it and the
+share of their rank each passes on (one over its number of links).
+One step of the random surfer is then a sparse matrix product with
+SciPy, which sends a whole block of rank vectors across each link in
+one pass. Dangling pages, which have no links, spread their rank
+evenly over every page; that is a rank-one term added in O(N), not a
+link to every page. The surfer may also jump to pages drawn from a
+teleport vector, or from each column of a block of them at once.
+
+`update_pagerank` applies link insertions and deletions by patching
+the CSR arrays in place of rebuilding them, and updates existing ranks
+by warm-starting the iteration from them.
+
+Usage: python sparse.py corpus
+       python sparse.py [--pages 1000000] [--links 10] [--edits 100]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse
+
+from pagerank import DAMPING, crawl
+
+# Iteration stops once the ranks change by less than this in L1 norm
+TOLERANCE = 1e-6
+
+MAX_ITERATIONS = 1000
+
+
+class LinkGraph():
+    def __init__(self, pages, sources, targets):
+        """
+        Builds the in-link matrix of a graph of `len(pages)` pages with
+        a link from page `sources[e]` to page `targets[e]` for every e.
+        """
+        n = len(pages)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        out_degree = np.bincount(sources, minlength=n)
+
+        # Group the links by target: row t of the matrix lists the
+        # pages linking to t, in sources[indptr[t]:indptr[t + 1]]
+        order = np.argsort(targets, kind="stable")
+        sources = sources[order]
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=n), out=indptr[1:])
+
+        # Each link carries one over its source's number of links
+        weights = 1 / out_degree[sources]
+        self.set_links(pages, sources, indptr, out_degree, weights)
+        self.index = None
+
+    def set_links(self, pages, sources, indptr, out_degree, weights):
+        """
+        Stores the in-link CSR arrays and builds the matrix from them.
+        """
+        self.pages = pages
+        self.n = n = len(pages)
+        self.sources = sources
+        self.indptr = indptr
+        self.out_degree = out_degree
+        self.dangling = out_degree == 0
+        self.weights = weights
+        self.matrix = scipy.sparse.csr_matrix(
+            (weights, sources, indptr), shape=(n, n)
+        )
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds the graph of a corpus dictionary as returned by `crawl`.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        sources = [index[page] for page in pages for link in corpus[page]]
+        targets = [index[link] for page in pages for link in corpus[page]]
+        return cls(pages, sources, targets)
+
+    def propagate(self, ranks):
+        """
+        Returns the rank every page receives through links when each
+        page splits `ranks` evenly across its links. `ranks` may be an
+        n x b block, whose columns are sent together.
+        """
+        return self.matrix @ ranks
+
+    def step(self, ranks, damping_factor, teleport=None):
+        """
+        Returns the ranks after one step of the random surfer, who jumps
+        to a page drawn from `teleport` (uniform by default) rather than
+        following a link, and always does so from a dangling page.
+        `ranks` and `teleport` may be n x b blocks of b columns.
+        """
+        if teleport is None:
+            teleport = 1 / self.n
+        # Rank from dangling pages and random jumps both go to `teleport`
+        jumping = damping_factor * ranks[self.dangling].sum(axis=0)
+        new_ranks = self.propagate(ranks)
+        new_ranks *= damping_factor
+        new_ranks += (jumping + 1 - damping_factor) * teleport
+        return new_ranks
+
+    def iterate(self, damping_factor, tolerance=TOLERANCE, ranks=None,
+                teleport=None):
+        """
+        Runs power iteration from `ranks` (`teleport`, or uniform, by
+        default) until every column of the ranks changes by less than
+        `tolerance` in L1 norm.
+        Returns the ranks and the number of iterations.
+        """
+        if ranks is None:
+            ranks = (np.full(self.n, 1 / self.n) if teleport is None
+                     else np.array(teleport, dtype=float))
+        for iterations in range(1, MAX_ITERATIONS + 1):
+            new_ranks = self.step(ranks, damping_factor, teleport)
+            change = np.abs(new_ranks - ranks).sum(axis=0).max()
+            ranks = new_ranks
+            if change < tolerance:
+                break
+        return ranks, iterations
+
+    def targets(self):
+        """
+        Returns the target of every link, in the order of `sources`.
+        """
+        return np.repeat(np.arange(self.n), np.diff(self.indptr))
+
+    def page_index(self):
+        """
+        Returns a dictionary from each page to its position, built the
+        first time it is needed and shared with edited graphs.
+        """
+        if self.index is None:
+            self.index = {page: i for i, page in enumerate(self.pages)}
+        return self.index
+
+    def find(self, source, target):
+        """
+        Returns the positions in `sources` of the links from page
+        `source` to page `target`, by searching the row of `target`.
+        """
+        start = self.indptr[target]
+        row = self.sources[start:self.indptr[target + 1]]
+        return start + np.flatnonzero(row == source)
+
+    def edit(self, insertions=(), deletions=()):
+        """
+        Returns a new graph with the links in `insertions` added and
+        those in `deletions` removed, both given as (source, target)
+        pairs of pages. New pages are added after the existing ones,
+        and inserting a link that already exists changes nothing.
+
+        Each link is looked up in its target's row only, and the CSR
+        arrays are patched rather than rebuilt from the list of links.
+        """
+        index = self.page_index()
+        pages = self.pages
+        new_pages = []
+        for page in [page for link in insertions for page in link]:
+            if page not in index and page not in new_pages:
+                new_pages.append(page)
+        if new_pages:
+            index = dict(index)
+            pages = list(pages) + new_pages
+            for page in new_pages:
+                index[page] = len(index)
+        n = len(pages)
+
+        removed = []
+        for source, target in deletions:
+            if source in index and target in index:
+                s, t = index[source], index[target]
+                if t < self.n:
+                    removed.extend(self.find(s, t).tolist())
+        removed = np.unique(np.array(removed, dtype=np.int64))
+        gone = set(removed.tolist())
+
+        # Links form a set, so skip insertions that are already links
+        # (and not deleted) or that repeat one earlier in the batch
+        added = []
+        for source, target in dict.fromkeys(insertions):
+            s, t = index[source], index[target]
+            if t >= self.n or not set(self.find(s, t).tolist()) - gone:
+                added.append((s, t))
+        added = np.array(added, dtype=np.int64).reshape(-1, 2)
+        added = added[np.argsort(added[:, 1], kind="stable")]
+
+        # Every row keeps its links in place; new links go at its end
+        old_targets = np.searchsorted(self.indptr, removed, side="right") - 1
+        indptr = np.append(self.indptr,
+                           np.full(n - self.n, self.indptr[-1]))
+        positions = indptr[added[:, 1] + 1]
+        positions -= np.searchsorted(removed, positions)
+        sources = np.insert(np.delete(self.sources, removed), positions,
+                            added[:, 0])
+
+        out_degree = np.append(self.out_degree,
+                               np.zeros(n - self.n, dtype=np.int64))
+        np.subtract.at(out_degree, self.sources[removed], 1)
+        np.add.at(out_degree, added[:, 0], 1)
+        change = (np.bincount(added[:, 1], minlength=n)
+                  - np.bincount(old_targets, minlength=n))
+        indptr[1:] += np.cumsum(change)
+
+        # Only the links of sources whose number of links changed carry
+        # a new weight
+        weights = np.insert(np.delete(self.weights, removed), positions,
+                            1 / out_degree[added[:, 0]])
+        changed = np.zeros(n, dtype=bool)
+        changed[self.sources[removed]] = True
+        changed[added[:, 0]] = True
+        stale = np.flatnonzero(changed[sources])
+        weights[stale] = 1 / out_degree[sources[stale]]
+
+        graph = LinkGraph.__new__(LinkGraph)
+        graph.set_links(pages, sources, indptr, out_degree, weights)
+        graph.index = index
+        return graph
+
+    def as_dict(self, ranks):
+        """
+        Returns `ranks` as a dictionary from page names to floats.
+        """
+        return dict(zip(self.pages, ranks.tolist()))
+
+
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE):
+    """
+    Return PageRank values for each page by iteratively updating
+    PageRank values until convergence.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    ranks, iterations = graph.iterate(damping_factor, tolerance)
+    return graph.as_dict(ranks)
+
+
+def update_pagerank(graph, ranks, insertions, deletions, damping_factor,
+                    tolerance=TOLERANCE):
+    """
+    Applies link `insertions` and `deletions` to `graph`, whose PageRank
+    is `ranks`, and updates the ranks by power iteration starting from
+    the old ones, which are already close for a small change.
+    Returns the new graph, its ranks and the number of iterations.
+    """
+    graph = graph.edit(insertions, deletions)
+
+    # Pages new to the graph start with the uniform rank
+    start = np.full(graph.n, 1 / graph.n)
+    start[:len(ranks)] = ranks * (len(ranks) / graph.n)
+    ranks, iterations = graph.iterate(damping_factor, tolerance, start)
+    return graph, ranks, iterations
+
+
+def random_graph(pages, links, seed=0):
+    """
+    Returns a random graph of `pages` pages with `links` links each on
+    average, some pages having none.
+    """
+    rng = np.random.default_rng(seed)
+    degrees = rng.poisson(links, pages)
+    sources = np.repeat(np.arange(pages), degrees)
+    targets = rng.integers(0, pages, len(sources))
+    keep = sources != targets
+    return LinkGraph(np.arange(pages), sources[keep], targets[keep])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute PageRank by sparse power iteration."
+    )
+    parser.add_argument("corpus", nargs="?")
+    parser.add_argument("--pages", type=int, default=1000000,
+                        help="pages in a random graph, without a corpus")
+    parser.add_argument("--links", type=float, default=10,
+                        help="average links per page of a random graph")
+    parser.add_argument("--edits", type=int, default=0,
+                        help="links to insert and delete in a random graph, "
+                        "then update the ranks incrementally")
+    args = parser.parse_args()
+
+    if args.corpus:
+        ranks = iterate_pagerank(crawl(args.corpus), DAMPING)
+        print("PageRank Results from Sparse Iteration")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        return
+
+    start = time.perf_counter()
+    graph = random_graph(args.pages, args.links)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    ranks, iterations = graph.iterate(DAMPING)
+    elapsed = time.perf_counter() - start
+    print(f"{graph.n} pages, {len(graph.sources)} links: built in "
+          f"{built:.2f} s, {iterations} iterations in {elapsed:.2f} s, "
+          f"ranks sum to {ranks.sum():.6f}")
+    if not args.edits:
+        return
+
+    # Delete some existing links and insert as many random ones
+    rng = np.random.default_rng(1)
+    chosen = rng.choice(len(graph.sources), args.edits, replace=False)
+    deletions = list(zip(graph.sources[chosen].tolist(),
+                         graph.targets()[chosen].tolist()))
+    insertions = list(zip(rng.integers(0, graph.n, args.edits).tolist(),
+                          rng.integers(0, graph.n, args.edits).tolist()))
+
+    start = time.perf_counter()
+    edited, warm, warm_iterations = update_pagerank(
+        graph, ranks, insertions, deletions, DAMPING
+    )
+    warm_elapsed = time.perf_counter() - start
+
+    # Against building the edited graph from its list of links and
+    # solving it from the uniform ranks
+    sources = edited.sources
+    targets = edited.targets()
+    start = time.perf_counter()
+    cold, cold_iterations = LinkGraph(edited.pages, sources,
+                                      targets).iterate(DAMPING)
+    cold_elapsed = time.perf_counter() - start
+    print(f"After {args.edits} insertions and deletions: update "
+          f"{warm_iterations} iterations in {warm_elapsed:.2f} s, "
+          f"rebuild and solve {cold_iterations} in {cold_elapsed:.2f} s "
+          f"({cold_elapsed - warm_elapsed:.2f} s saved), "
+          f"L1 difference {np.abs(warm - cold).sum():.2e}")
+
+if __name__ == "__main__":
+    main()